@@ -25,10 +25,12 @@ import logging.config
 import os
 import sys
 
+import gobject
 import gtk
 
 from nostaples import constants
 from nostaples.controllers.about import AboutController
+from nostaples.controllers.continuous import ContinuousController
 from nostaples.controllers.document import DocumentController
 from nostaples.controllers.main import MainController
 from nostaples.controllers.page import PageController
@@ -43,8 +45,12 @@ from nostaples.models.save import SaveModel
 from nostaples.models.status import StatusModel
 import nostaples.sane as saneme
 import nostaples.utils.gtkexcepthook
+from nostaples.utils.pagestore import CompressedPageStore, MappedPageStore, \
+    remove_stale_sessions
 from nostaples.utils.state import GConfStateManager
+from nostaples.utils.workers import TransformWorkerPool
 from nostaples.views.about import AboutView
+from nostaples.views.continuous import ContinuousView
 from nostaples.views.document import DocumentView
 from nostaples.views.main import MainView
 from nostaples.views.page import PageView
@@ -66,6 +72,9 @@ class Application(object):
     
     _state_manager = None
     _sane = None
+    _mapped_page_store = None
+    _compressed_page_store = None
+    _transform_pool = None
     
     _main_model = None
     _main_controller = None
@@ -79,6 +88,9 @@ class Application(object):
     _page_controller = None
     _page_view = None
     
+    _continuous_controller = None
+    _continuous_view = None
+    
     _status_model = None
     _status_controller = None
     _status_view = None
@@ -101,13 +113,21 @@ class Application(object):
         (which will in turn construct all sub components).
         Per
         """
+        self._init_threads()
         self._init_config()
         self._init_logging()
+        self._init_sessions()
         self._init_state()
         self._init_sane()
         self._init_main_components()
         self._init_settings()
 
+    def _init_threads(self):
+        """
+        Allow Python threads to run while the GTK main loop is idle.
+        """
+        gobject.threads_init()
+
     def _init_config(self):
         """Setup the config directory."""
         if not os.path.exists(constants.APP_DIRECTORY):
@@ -117,6 +137,10 @@ class Application(object):
         """Setup logging for the application."""
         logging.config.fileConfig(constants.LOGGING_CONFIG)
         
+    def _init_sessions(self):
+        """Remove page store sessions left behind by a crash."""
+        remove_stale_sessions(constants.SESSION_DIRECTORY)
+        
     def _init_state(self):
         """Setup the state manager."""
         self._state_manager = GConfStateManager()
@@ -150,7 +174,19 @@ class Application(object):
         """Execute the GTK main loop."""
         assert isinstance(self._main_view, MainView)
         self._main_view.show()
-        gtk.main()
+        
+        try:
+            gtk.main()
+        finally:
+            # A save reads from the page stores until it is stopped
+            if self._save_controller:
+                self._save_controller.stop()
+            if self._transform_pool:
+                self._transform_pool.stop()
+            if self._mapped_page_store:
+                self._mapped_page_store.close()
+            if self._compressed_page_store:
+                self._compressed_page_store.close()
         
     def get_state_manager(self):
         """Return the L{GConfStateManager} component."""
@@ -161,6 +197,39 @@ class Application(object):
         """Return the SaneMe object."""
         assert isinstance(self._sane, saneme.SaneMe)
         return self._sane
+    
+    def get_page_store(self):
+        """
+        Return the page store that newly scanned pages should keep
+        their raw data in, as selected in the preferences: either a
+        L{MappedPageStore} or a L{CompressedPageStore}.
+        
+        Pages keep a reference to the store they were created in, so
+        changing the preference only affects subsequent scans.
+        """
+        if self.get_preferences_model().page_storage == 'Compressed Memory':
+            if not self._compressed_page_store:
+                self._compressed_page_store = CompressedPageStore(
+                    constants.COMPRESSED_PAGE_CACHE_SIZE)
+            
+            return self._compressed_page_store
+        
+        if not self._mapped_page_store:
+            self._mapped_page_store = MappedPageStore(
+                constants.SESSION_DIRECTORY)
+        
+        return self._mapped_page_store
+        
+    def get_transform_pool(self):
+        """
+        Return the L{TransformWorkerPool} used to transform pages
+        off of the main thread.
+        """
+        if not self._transform_pool:
+            self._transform_pool = TransformWorkerPool(
+                constants.TRANSFORM_WORKER_COUNT)
+        
+        return self._transform_pool
         
     def get_main_model(self):
         """Return the L{MainModel} component."""
@@ -232,6 +301,20 @@ class Application(object):
                     
         return self._page_view
     
+    def get_continuous_controller(self):
+        """Return the L{ContinuousController} component."""
+        if not self._continuous_controller:            
+            self._continuous_controller = ContinuousController(self)
+                    
+        return self._continuous_controller
+    
+    def get_continuous_view(self):
+        """Return the L{ContinuousView} component."""
+        if not self._continuous_view:            
+            self._continuous_view = ContinuousView(self)
+                    
+        return self._continuous_view
+    
     def get_status_model(self):
         """Return the L{StatusModel} component."""
         if not self._status_model:
@@ -132,6 +132,7 @@ DEFAULT_SHOW_TOOLBAR = True
 DEFAULT_SHOW_STATUSBAR = True
 DEFAULT_SHOW_THUMBNAILS = True
 DEFAULT_SHOW_ADJUSTMENTS = False
+DEFAULT_SHOW_CONTINUOUS = False
 DEFAULT_ROTATE_ALL_PAGES = False
 DEFAULT_ACTIVE_SCANNER = ''
 DEFAULT_SCAN_MODE = 'Color'
@@ -145,15 +146,54 @@ DEFAULT_THUMBNAIL_SIZE = 128
 DEFAULT_SHOW_DOCUMENT_METADATA = True
 DEFAULT_BLACKLISTED_SCANNERS = []
 DEFAULT_TOOLBAR_STYLE = 'System Default'
+DEFAULT_PAGE_STORAGE = 'Disk (Default)'
 
 THUMBNAILS_SCALING_MODE = Image.ANTIALIAS
+# Shown until a thumbnail is rendered, as 0xRRGGBBAA
+THUMBNAIL_PLACEHOLDER_COLOR = 0xc0c0c0ff
+PREVIEW_LEVEL_SCALING_MODE = Image.ANTIALIAS
 
 PREVIEW_ZOOM_MAX = 5.0
 PREVIEW_ZOOM_MIN = 1.0
 PREVIEW_ZOOM_STEP = 0.5
+PREVIEW_ZOOM_RECT_WIDTH = 2
+PREVIEW_WHEEL_ZOOM_FACTOR = 1.25
+PREVIEW_WHEEL_SETTLE_DELAY = 250
+
+# Edge length in pixels of the tiles the preview is drawn in, and the
+# number of tiles kept cached.
+PREVIEW_TILE_SIZE = 256
+PREVIEW_TILE_CACHE_SIZE = 128
+# Rendered pages kept by the continuous view
+CONTINUOUS_PAGE_CACHE_SIZE = 12
+CONTINUOUS_PAGE_SPACING = 8
+# Pages are scaled from full size, so a filter which does not alias
+CONTINUOUS_SCALING_MODE = Image.ANTIALIAS
+# Fraction of the visible height scrolled by each wheel notch
+CONTINUOUS_SCROLL_STEP = 0.2
+# Memory the display images of pages adjacent to the current one may take
+PREFETCH_MEMORY_BUDGET = 128 * 1024 * 1024
+
+# Gray level at and above which adjusted lineart pages become white.
+LINEART_THRESHOLD = 128
+
+# Milliseconds an adjustment slider must rest before the adjustment is
+# applied at full resolution.
+ADJUSTMENT_SETTLE_DELAY = 300
 
 MAX_VALID_OPTION_VALUES = 11
 
+# Number of decompressed pages kept by the compressed page store
+COMPRESSED_PAGE_CACHE_SIZE = 4
+
+# Number of threads used to transform pages in the background.  PIL holds
+# the interpreter lock for part of each transform, so more threads do not
+# make transforms proportionally faster.
+try:
+    TRANSFORM_WORKER_COUNT = max(1, os.sysconf('SC_NPROCESSORS_ONLN'))
+except (AttributeError, ValueError):
+    TRANSFORM_WORKER_COUNT = 1
+
 SCAN_CANCELLED = -1
 SCAN_FAILURE = 0
 SCAN_SUCCESS = 1
@@ -166,15 +206,19 @@ GCONF_LIST_SEPARATOR = '^'
 
 # TODO: rename to CONFIG_DIRECTORY
 APP_DIRECTORY = os.path.expanduser('~/.nostaples')
+SESSION_DIRECTORY = os.path.join(APP_DIRECTORY, 'sessions')
 LOGGING_CONFIG = os.path.join(os.path.dirname(__file__), 'logging.config')
 GUI_DIRECTORY = os.path.join(os.path.dirname(__file__), 'gui')
 
+# Previews are scaled by PIL before they are converted to pixbufs, so
+# that pages need not be expanded to RGB at full size.  PIL has no
+# equivalent of GTK's tiles filter, bilinear is the nearest match.
 PREVIEW_MODES = \
 {
-    'Nearest (Fastest)': gtk.gdk.INTERP_NEAREST,
-    'Tiles': gtk.gdk.INTERP_TILES,
-    'Bilinear (Default)': gtk.gdk.INTERP_BILINEAR,
-    'Antialias (Smoothest)': gtk.gdk.INTERP_HYPER
+    'Nearest (Fastest)': Image.NEAREST,
+    'Tiles': Image.BILINEAR,
+    'Bilinear (Default)': Image.BILINEAR,
+    'Antialias (Smoothest)': Image.ANTIALIAS
 }
  
 PREVIEW_MODES_LIST = \
@@ -210,6 +254,12 @@ TOOLBAR_STYLES = \
     'Icons and Text (Side by side)': gtk.TOOLBAR_BOTH_HORIZ
 }
 
+PAGE_STORAGE_LIST = \
+[
+    'Disk (Default)',
+    'Compressed Memory'
+]
+
 TOOLBAR_STYLES_LIST = \
 [
     'System Default',
@@ -0,0 +1,395 @@
+#!/usr/bin/python
+
+#~ This file is part of NoStaples.
+
+#~ NoStaples is free software: you can redistribute it and/or modify
+#~ it under the terms of the GNU General Public License as published by
+#~ the Free Software Foundation, either version 3 of the License, or
+#~ (at your option) any later version.
+
+#~ NoStaples is distributed in the hope that it will be useful,
+#~ but WITHOUT ANY WARRANTY; without even the implied warranty of
+#~ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#~ GNU General Public License for more details.
+
+#~ You should have received a copy of the GNU General Public License
+#~ along with NoStaples.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+This module holds the L{ContinuousController}, which manages interaction 
+between the L{DocumentModel} and L{ContinuousView}.
+"""
+
+import bisect
+import logging
+
+import gobject
+import gtk
+from gtkmvc.controller import Controller
+
+from nostaples import constants
+from nostaples.utils.cache import LRUCache
+
+class ContinuousController(Controller):
+    """
+    Manages interaction between the L{DocumentModel} and 
+    L{ContinuousView}.
+    
+    Every page is laid out in one column, scaled to the width of the view,
+    but only the pages in or near the visible part of the column are
+    rendered.  Rendered pages are held in a small cache, so those
+    scrolled well out of view are released and memory use does not grow
+    with the length of the document.
+    """
+    
+    # SETUP METHODS
+    
+    def __init__(self, application):
+        """
+        Constructs the ContinuousController.
+        """
+        self.application = application
+        Controller.__init__(self, application.get_document_model())
+        
+        self.log = logging.getLogger(self.__class__.__name__)
+        
+        # Rendered pages, keyed by page, adjustments, rotation and size
+        self.page_cache = LRUCache(constants.CONTINUOUS_PAGE_CACHE_SIZE)
+        
+        self.view_width = 0
+        self.view_height = 0
+        
+        # The pages in document order, with the top edge and the scaled
+        # size of each in the column, and the index of each page
+        self.page_models = []
+        self.page_tops = []
+        self.page_sizes = []
+        self.page_indices = {}
+        self.layout_source_id = None
+        
+        # Each page is rendered as a job of its own, owned by the pair of
+        # this controller and the page, so that pages are delivered as
+        # they finish.  Maps each page to the key it is being rendered for.
+        self.pending_renders = {}
+        
+        # Incremented for each render job so that the transform pool can
+        # drop those which have been superseded
+        self.render_generation = 0
+        
+        self.placeholder_color = \
+            gtk.gdk.colormap_get_system().alloc_color(
+                gtk.gdk.Color(32768, 32768, 32768), False, True)
+        
+        document_model = application.get_document_model()
+        for signal in ['row-inserted', 'row-deleted', 'row-changed', 
+            'rows-reordered']:
+            document_model.connect(signal, self._on_document_changed)
+        
+        self.log.debug('Created.')
+
+    def register_view(self, view):
+        """
+        Registers this controller with a view.
+        """
+        Controller.register_view(self, view)
+        
+        self.log.debug('%s registered.', view.__class__.__name__)
+        
+    # USER INTERFACE CALLBACKS
+    
+    def on_continuous_view_layout_button_press_event(self, widget, event):
+        """
+        Selects the page that was clicked, so that it can be adjusted or
+        viewed on its own.
+        """
+        document_view = self.application.get_document_view()
+        
+        index = self._get_page_index_at(event.y)
+        
+        if index is not None and event.button == 1:
+            document_view['thumbnails_tree_view'].get_selection().select_path(
+                index)
+    
+    def on_continuous_view_layout_scroll_event(self, widget, event):
+        """
+        Scrolls the column of pages.
+        """
+        vertical_adjustment = widget.get_vadjustment()
+        
+        step = vertical_adjustment.page_size * constants.CONTINUOUS_SCROLL_STEP
+        
+        if event.direction == gtk.gdk.SCROLL_UP:
+            value = vertical_adjustment.value - step
+        elif event.direction == gtk.gdk.SCROLL_DOWN:
+            value = vertical_adjustment.value + step
+        else:
+            return
+        
+        value = min(value, 
+            vertical_adjustment.upper - vertical_adjustment.page_size)
+        vertical_adjustment.set_value(max(value, 0))
+    
+    def on_continuous_view_layout_expose_event(self, widget, event):
+        """
+        Draws the exposed pages, or placeholders for those which have not
+        been rendered yet.
+        """
+        if event.window == widget.bin_window:
+            self._draw_pages(event.area)
+    
+    def on_continuous_view_layout_size_request(self, widget, size):
+        size.width = 1
+        size.height = 1
+    
+    def on_continuous_view_layout_size_allocate(self, widget, allocation):
+        """
+        Lays the pages out again if the width available to them has
+        changed.
+        """
+        if allocation.height != self.view_height:
+            self.view_height = allocation.height
+            self._update_scrollbar()
+            
+        if allocation.width == self.view_width:
+            return
+        
+        self.view_width = allocation.width
+        
+        self._update_layout()
+        
+    # PRIVATE METHODS
+        
+    def _on_document_changed(self, document_model, *args):
+        """
+        Lays the pages out again once the main loop is idle, so that
+        a batch of changes to the document is only laid out once.
+        """
+        if self.layout_source_id is None:
+            self.layout_source_id = gobject.idle_add(self._update_layout)
+    
+    def _update_layout(self):
+        """
+        Lay out all the pages of the document, each scaled to the width
+        of the view.  Nothing is rendered here.
+        """
+        continuous_view = self.application.get_continuous_view()
+        document_model = self.application.get_document_model()
+        
+        if self.layout_source_id is not None:
+            gobject.source_remove(self.layout_source_id)
+            self.layout_source_id = None
+        
+        spacing = constants.CONTINUOUS_PAGE_SPACING
+        width = max(self.view_width - 2 * spacing, 1)
+        
+        self.page_models = [row[0] for row in document_model]
+        self.page_tops = []
+        self.page_sizes = []
+        self.page_indices = {}
+        
+        top = spacing
+        for index, page_model in enumerate(self.page_models):
+            height = max(int(page_model.height * width / page_model.width), 1)
+            
+            self.page_tops.append(top)
+            self.page_sizes.append((width, height))
+            self.page_indices[page_model] = index
+            
+            top += height + spacing
+        
+        # Renders are only abandoned if their pages were removed or are
+        # would now be drawn differently
+        for page_model in self.pending_renders.keys():
+            index = self.page_indices.get(page_model)
+            
+            if index is None or \
+                self.pending_renders[page_model] != self._get_page_key(index):
+                self._cancel_render(page_model)
+        
+        continuous_view['continuous_view_layout'].set_size(
+            self.view_width, top)
+        
+        self._update_scrollbar()
+        continuous_view['continuous_view_layout'].queue_draw()
+        
+        return False
+    
+    def _update_scrollbar(self):
+        """
+        Show the scrollbar only if the pages do not fit in the view.
+        """
+        continuous_view = self.application.get_continuous_view()
+        
+        column_height = continuous_view['continuous_view_layout'].get_size()[1]
+        
+        if column_height > self.view_height:
+            continuous_view['continuous_view_vertical_scrollbar'].show()
+        else:
+            continuous_view['continuous_view_vertical_scrollbar'].hide()
+    
+    def _get_page_index_at(self, y):
+        """
+        Get the index of the page at y in layout coordinates, or None if
+        there is no page there.
+        """
+        index = bisect.bisect_right(self.page_tops, y) - 1
+        
+        if index < 0 or y >= self.page_tops[index] + self.page_sizes[index][1]:
+            return None
+        
+        return index
+    
+    def _get_page_range(self, upper, lower):
+        """
+        Get the range of the indices of the pages which intersect the
+        band from upper to lower in layout coordinates.
+        """
+        first = max(bisect.bisect_right(self.page_tops, upper) - 1, 0)
+        last = bisect.bisect_left(self.page_tops, lower)
+        
+        return range(first, last)
+    
+    def _get_page_key(self, index):
+        """
+        Get the key the rendered page at index is cached under.
+        """
+        page_model = self.page_models[index]
+        
+        return (page_model, page_model.adjustment_generation, 
+            page_model.rotation, self.page_sizes[index])
+    
+    def _draw_pages(self, area):
+        """
+        Draw the pages which intersect an exposed area of the layout,
+        and queue any that are in or near the visible part of the column
+        and not rendered to be rendered.
+        """
+        continuous_view = self.application.get_continuous_view()
+        
+        window = continuous_view['continuous_view_layout'].bin_window
+        graphics_context = window.new_gc(foreground=self.placeholder_color)
+        
+        left = constants.CONTINUOUS_PAGE_SPACING
+        
+        for index in self._get_page_range(area.y, area.y + area.height):
+            pixbuf = self.page_cache.get(self._get_page_key(index))
+            top = self.page_tops[index]
+            width, height = self.page_sizes[index]
+            
+            if pixbuf is not None:
+                window.draw_pixbuf(None, pixbuf, 0, 0, left, top)
+            else:
+                window.draw_rectangle(
+                    graphics_context, True, left, top, width, height)
+        
+        self._queue_render()
+    
+    def _queue_render(self):
+        """
+        Submit the pages in or near the visible part of the column which
+        are neither rendered nor being rendered to the transform pool, and
+        abandon the renders of any other pages.
+        
+        Pages a view height either side of the visible part are
+        included, so that they are ready when scrolled to.
+        """
+        continuous_view = self.application.get_continuous_view()
+        transform_pool = self.application.get_transform_pool()
+        
+        visible_top = \
+            continuous_view['continuous_view_layout'].get_vadjustment().value
+        visible_pages = self._get_page_range(
+            visible_top, visible_top + self.view_height)
+        
+        if not visible_pages:
+            return
+        
+        # The visible pages first, then those below and above, but no more
+        # than can be cached, lest they evict each other
+        near_pages = list(visible_pages)
+        for index in \
+            self._get_page_range(
+                visible_top + self.view_height, 
+                visible_top + 2 * self.view_height) + \
+            self._get_page_range(
+                visible_top - self.view_height, visible_top)[::-1]:
+            if index not in near_pages:
+                near_pages.append(index)
+        
+        near_pages = near_pages[:constants.CONTINUOUS_PAGE_CACHE_SIZE]
+        near_page_models = set()
+        
+        for index in near_pages:
+            page_model = self.page_models[index]
+            key = self._get_page_key(index)
+            
+            near_page_models.add(page_model)
+            
+            if not page_model.has_image or key in self.page_cache or \
+                self.pending_renders.get(page_model) == key:
+                continue
+            
+            settings = (page_model.brightness, page_model.contrast, 
+                page_model.sharpness)
+            
+            self.pending_renders[page_model] = key
+            self.render_generation += 1
+            transform_pool.submit(
+                (self, page_model), self.render_generation, 
+                self._on_page_rendered, self._render_page, key, settings,
+                errback=lambda exc_info, page_model=page_model: 
+                    self._cancel_render(page_model))
+        
+        # Pages scrolled well out of view are no longer worth rendering
+        for page_model in self.pending_renders.keys():
+            if page_model not in near_page_models:
+                self._cancel_render(page_model)
+        
+    def _cancel_render(self, page_model):
+        """
+        Abandon the render of a page.
+        """
+        self.application.get_transform_pool().cancel((self, page_model))
+        del self.pending_renders[page_model]
+        
+    def _render_page(self, key, settings):
+        """
+        Render a page at its scaled size.  Runs on a worker thread.
+        
+        @return: A (key, pixbuf) tuple, the pixbuf being None if the page
+                    has been deleted since it was queued.
+        """
+        page_model, adjustment_generation, rotation, size = key
+        
+        return (key, page_model.render_proxy(
+            settings, rotation, (0, 0, page_model.width, page_model.height),
+            size, constants.CONTINUOUS_SCALING_MODE))
+    
+    def _on_page_rendered(self, result):
+        """
+        Cache a rendered page and draw it over its placeholder, if it is
+        still laid out as it was rendered.
+        """
+        continuous_view = self.application.get_continuous_view()
+        
+        key, pixbuf = result
+        page_model = key[0]
+        
+        # The job is finished, so the pool need not track its owner
+        self._cancel_render(page_model)
+        
+        if pixbuf is None:
+            return
+        
+        self.page_cache.put(key, pixbuf)
+        
+        index = self.page_indices.get(page_model)
+        
+        if index is None or key != self._get_page_key(index):
+            return
+        
+        width, height = self.page_sizes[index]
+        continuous_view['continuous_view_layout'].bin_window. \
+            invalidate_rect((constants.CONTINUOUS_PAGE_SPACING,
+                self.page_tops[index], width, height), False)
@@ -22,10 +22,11 @@ between the L{DocumentModel} and L{DocumentView}.
 
 import logging
 
+import gobject
 import gtk
 from gtkmvc.controller import Controller
 
-import nostaples.utils.gui
+from nostaples import constants
 
 class DocumentController(Controller):
     """
@@ -46,12 +47,17 @@ class DocumentController(Controller):
         preferences_model = application.get_preferences_model()
         preferences_model.register_observer(self)
         
-        status_controller = application.get_status_controller()
-        self.status_context = \
-            status_controller.get_context_id(self.__class__.__name__)
-        
         application.get_document_model().connect(
           'row-changed', self.on_document_model_row_changed)
+        
+        # Timeout after which slider changes are applied at full resolution
+        self.adjustments_timeout_id = None
+        self.preview_source_id = None
+        # Set while the sliders are being moved to match a page, rather
+        # than by the user
+        self.updating_sliders = False
+        # The most pages rendering at once since none were
+        self.rendering_total = 0
 
         self.log = logging.getLogger(self.__class__.__name__)
         self.log.debug('Created.')
@@ -87,8 +93,27 @@ class DocumentController(Controller):
         selection_iter = selection.get_selected()[1]
         
         if selection_iter:
+            # Finish adjusting the previous page before the sliders move
+            self.commit_pending_adjustments()
+            
             page_model = document_model.get_value(selection_iter, 0)
-            page_controller.set_current_page_model(page_model)
+            
+            # Prefetch the pages either side, the next being the likelier
+            neighbour_page_models = []
+            
+            next_iter = document_model.iter_next(selection_iter)
+            if next_iter:
+                neighbour_page_models.append(
+                    document_model.get_value(next_iter, 0))
+            
+            row = document_model.get_path(selection_iter)[0]
+            if row > 0:
+                neighbour_page_models.append(
+                    document_model.get_value(
+                        document_model.get_iter((row - 1,)), 0))
+            
+            page_controller.set_current_page_model(
+                page_model, neighbour_page_models)
             document_view['brightness_scale'].set_value(page_model.brightness)
             document_view['contrast_scale'].set_value(page_model.contrast)
             document_view['sharpness_scale'].set_value(page_model.sharpness)
@@ -124,8 +149,8 @@ class DocumentController(Controller):
         change will be treated as a new row and it will be
         selected.  This causes all sorts of unusual problems. To
         avoid this, all changes to a page_model that will cause
-        thumbnail_pixbuf to be updated should be preceeded by
-        setting the manually_updating_row flag so that this event
+        thumbnail_pixbuf to be updated cause the L{DocumentModel}
+        to set the manually_updating_row flag so that this event
         can bypass them appropriately.
         """
         document_model = self.application.get_document_model()
@@ -149,151 +174,71 @@ class DocumentController(Controller):
     
     def on_brightness_scale_value_changed(self, widget):
         """
-        Sets the brightness of the current page or,
-        if "Apply to all pages?" is checked, all scanned
-        pages.
-        
-        See L{on_document_model_row_changed} for an
-        explanation of the voodoo in this method.
-        """ 
-        document_model = self.application.get_document_model()
-        document_view = self.application.get_document_view()
-        page_model = self.application.get_current_page_model()
-        status_controller = self.application.get_status_controller()
-        
-        if document_model.adjust_all_pages:   
-            i = 1
-            page_iter = document_model.get_iter_first()
-            while page_iter:
-                status_controller.push(self.status_context, 'Updating page %i...' % i)
-                nostaples.utils.gui.flush_pending_events()
-                
-                page = document_model.get(page_iter, 0)[0]
-                document_model.manually_updating_row = True
-                page.brightness = \
-                    document_view['brightness_scale'].get_value()
-                page_iter = document_model.iter_next(page_iter)
-                
-                status_controller.pop(self.status_context)
-                i = i + 1
-        else:
-            status_controller.push(self.status_context, 'Updating current page...')
-            nostaples.utils.gui.flush_pending_events()
-                
-            page_model.brightness = \
-                document_view['brightness_scale'].get_value()
-                
-            status_controller.pop(self.status_context)
+        Preview the new brightness on the current page.
+        See L{_schedule_adjustments}.
+        """
+        self._schedule_adjustments()
     
     def on_contrast_scale_value_changed(self, widget):
         """
-        Sets the contrast of the current page or,
-        if "Apply to all pages?" is checked, all scanned
-        pages.
-        
-        See L{on_document_model_row_changed} for an
-        explanation of the voodoo in this method.
+        Preview the new contrast on the current page.
+        See L{_schedule_adjustments}.
         """
-        document_model = self.application.get_document_model()
-        document_view = self.application.get_document_view()
-        page_model = self.application.get_current_page_model()
-        status_controller = self.application.get_status_controller()
-        
-        if document_model.adjust_all_pages:      
-            i = 1
-            page_iter = document_model.get_iter_first()
-            while page_iter:
-                status_controller.push(self.status_context, 'Updating page %i...' % i)
-                nostaples.utils.gui.flush_pending_events()
-                
-                page = document_model.get(page_iter, 0)[0]
-                document_model.manually_updating_row = True
-                page.contrast = \
-                    document_view['contrast_scale'].get_value()
-                page_iter = document_model.iter_next(page_iter)
-                
-                status_controller.pop(self.status_context)
-                i = i + 1
-        else:
-            status_controller.push(self.status_context, 'Updating current page...')
-            nostaples.utils.gui.flush_pending_events()
-                
-            page_model.contrast = \
-                document_view['contrast_scale'].get_value()
-                
-            status_controller.pop(self.status_context)
+        self._schedule_adjustments()
     
     def on_sharpness_scale_value_changed(self, widget):
         """
-        Sets the sharpness of the current page or,
-        if "Apply to all pages?" is checked, all scanned
-        pages.
-        
-        See L{on_document_model_row_changed} for an
-        explanation of the voodoo in this method.
+        Preview the new sharpness on the current page.
+        See L{_schedule_adjustments}.
+        """
+        self._schedule_adjustments()
+                
+    def on_adjust_all_cancel_button_clicked(self, button):
+        """
+        Abandon rendering adjustments to all pages not yet finished,
+        restoring their previous adjustments.
         """
         document_model = self.application.get_document_model()
         document_view = self.application.get_document_view()
+        page_controller = self.application.get_page_controller()
         page_model = self.application.get_current_page_model()
-        status_controller = self.application.get_status_controller()
         
-        if document_model.adjust_all_pages:      
-            i = 1
+        self._cancel_scheduled_adjustments()
+        
+        document_model.begin_update()
+        try:
             page_iter = document_model.get_iter_first()
             while page_iter:
-                status_controller.push(self.status_context, 'Updating page %i...' % i)
-                nostaples.utils.gui.flush_pending_events()
-                
-                page = document_model.get(page_iter, 0)[0]
-                document_model.manually_updating_row = True
-                page.sharpness = \
-                    document_view['sharpness_scale'].get_value()
+                document_model.get_value(page_iter, 0).cancel_adjustments()
                 page_iter = document_model.iter_next(page_iter)
-                
-                status_controller.pop(self.status_context)
-                i = i + 1
-        else:
-            status_controller.push(self.status_context, 'Updating current page...')
-            nostaples.utils.gui.flush_pending_events()
-                
-            page_model.sharpness = \
-                document_view['sharpness_scale'].get_value()
-                
-            status_controller.pop(self.status_context)
-                
+        finally:
+            document_model.end_update()
+        
+        # Show the current page's adjustments without applying them anew
+        self.updating_sliders = True
+        try:
+            document_view['brightness_scale'].set_value(page_model.brightness)
+            document_view['contrast_scale'].set_value(page_model.contrast)
+            document_view['sharpness_scale'].set_value(page_model.sharpness)
+        finally:
+            self.updating_sliders = False
+        
+        page_controller.preview_adjustments(
+            page_model.brightness, page_model.contrast, page_model.sharpness)
+        
     def on_adjust_all_pages_check_toggled(self, checkbox):
         """
         When this box is checked, synchronize all page
         adjustments.
         
-        See L{on_document_model_row_changed} for an
-        explanation of the voodoo in this method.
-        
         # TODO: should set hourglass cursor
         """
         document_model = self.application.get_document_model()
-        document_view = self.application.get_document_view()
-        status_controller = self.application.get_status_controller()
         
         document_model.adjust_all_pages = checkbox.get_active()
         
-        if document_model.adjust_all_pages:      
-            i = 1
-            page_iter = document_model.get_iter_first()
-            while page_iter:
-                status_controller.push(self.status_context, 'Updating page %i...' % i)
-                nostaples.utils.gui.flush_pending_events()
-                
-                page = document_model.get(page_iter, 0)[0]
-                document_model.manually_updating_row = True
-                page.set_adjustments(
-                    document_view['brightness_scale'].get_value(),
-                    document_view['contrast_scale'].get_value(),
-                    document_view['sharpness_scale'].get_value())
-                page_iter = document_model.iter_next(page_iter)
-                
-                status_controller.pop(self.status_context)
-                i = i + 1
+        if document_model.adjust_all_pages:
+            self.commit_adjustments()
                 
     def on_delete_menu_item_activated(self, menu_item):
         """Delete the currently selected page."""
@@ -310,21 +255,40 @@ class DocumentController(Controller):
             self.application.get_page_controller().set_current_page_model(
                 self.application.get_null_page_model())
             
-    def property_thumbnail_size_value_change(self, model, old_value, new_value):
+    def property_rendering_count_value_change(self, model, old_value, new_value):
         """
-        Update the size of the thumbnail column and redraw all existing
-        thumbnails.
+        Show the progress of rendering adjustments to several pages, which
+        may be cancelled.
         """
-        document_model = self.application.get_document_model()
         document_view = self.application.get_document_view()
         
-        document_view['thumbnails_column'].set_fixed_width(new_value)
+        self.rendering_total = max(self.rendering_total, new_value)
+        
+        if new_value == 0 or self.rendering_total < 2:
+            if new_value == 0:
+                self.rendering_total = 0
+            
+            document_view['adjust_all_progress_box'].hide()
+            return
+        
+        finished = self.rendering_total - new_value
+        
+        document_view['adjust_all_progressbar'].set_fraction(
+            float(finished) / self.rendering_total)
+        document_view['adjust_all_progressbar'].set_text(
+            'Adjusted %i of %i pages' % (finished, self.rendering_total))
+        document_view['adjust_all_progress_box'].show()
+            
+    def property_thumbnail_size_value_change(self, model, old_value, new_value):
+        """
+        Update the size of the thumbnail column and redraw the visible
+        thumbnails, which are scaled to the new size as they are shown.
+        """
+        document_view = self.application.get_document_view()
         
-        page_iter = document_model.get_iter_first()
-        while page_iter:
-            page = document_model.get(page_iter, 0)[0]
-            page._update_thumbnail_pixbuf()
-            page_iter = document_model.iter_next(page_iter)
+        document_view.set_thumbnail_size(new_value)
+        document_view['thumbnails_tree_view'].columns_autosize()
+        document_view['thumbnails_tree_view'].queue_draw()
     
     # PUBLIC METHODS
             
@@ -337,6 +301,21 @@ class DocumentController(Controller):
         else:
             document_view['thumbnails_scrolled_window'].hide()
         
+    def toggle_continuous_visible(self, visible):
+        """
+        Toggles between the preview of the current page and the
+        continuous view of all pages.
+        """
+        page_view = self.application.get_page_view()
+        continuous_view = self.application.get_continuous_view()
+        
+        if visible:
+            page_view['page_view_table'].hide()
+            continuous_view['continuous_view_table'].show()
+        else:
+            continuous_view['continuous_view_table'].hide()
+            page_view['page_view_table'].show()
+        
     def toggle_adjustments_visible(self, visible):
         """Toggles the visibility of the adjustments view."""
         document_view = self.application.get_document_view()
@@ -346,6 +325,52 @@ class DocumentController(Controller):
         else:
             document_view['adjustments_alignment'].hide()
             
+    def commit_adjustments(self):
+        """
+        Apply the adjustment slider values at full resolution to the
+        current page or, if "Apply to all pages?" is checked, all
+        scanned pages.
+        
+        This is called once the sliders have settled, but may be called
+        at any time to apply pending changes immediately, as before
+        saving.
+        
+        Pages are only queued to be rendered here, so this returns at
+        once.  The progress of rendering several pages is shown by
+        L{property_rendering_count_value_change}.
+        """
+        document_model = self.application.get_document_model()
+        document_view = self.application.get_document_view()
+        page_model = self.application.get_current_page_model()
+        
+        self._cancel_scheduled_adjustments()
+        
+        brightness = document_view['brightness_scale'].get_value()
+        contrast = document_view['contrast_scale'].get_value()
+        sharpness = document_view['sharpness_scale'].get_value()
+        
+        if document_model.adjust_all_pages:
+            document_model.begin_update()
+            try:
+                page_iter = document_model.get_iter_first()
+                while page_iter:
+                    page = document_model.get_value(page_iter, 0)
+                    page.set_adjustments(brightness, contrast, sharpness)
+                    page_iter = document_model.iter_next(page_iter)
+            finally:
+                document_model.end_update()
+        else:
+            page_model.set_adjustments(brightness, contrast, sharpness)
+            
+    def commit_pending_adjustments(self):
+        """
+        Apply the adjustment slider values immediately if they have been
+        changed but have not settled yet.  Otherwise they have already
+        been applied, and nothing is done.
+        """
+        if self.adjustments_timeout_id is not None:
+            self.commit_adjustments()
+            
     def delete_selected(self):
         """
         Move the selection to the next page and delete the
@@ -356,10 +381,15 @@ class DocumentController(Controller):
         do it.  Unfortunantly, when trying to do it that way it
         was impossible to actually select another row as part of
         the event.  This seems to work much more reliably.
+        
+        Pages are not deleted while the document is being saved.
         """
         document_model = self.application.get_document_model()
         document_view = self.application.get_document_view()
         
+        if self.application.get_save_model().save_in_progress:
+            return
+        
         selection_iter = document_view['thumbnails_tree_view'].get_selection().get_selected()[1]
         
         if selection_iter:
@@ -386,51 +416,41 @@ class DocumentController(Controller):
         """
         Rotate the page counter-clockwise.
         """
-        status_controller = self.application.get_status_controller()
-        
         if not rotate_all:
             page_model = self.application.get_current_page_model()
-            status_controller.push(self.status_context, 'Rotating current page...')
-            nostaples.utils.gui.flush_pending_events()
             page_model.rotate_counter_clockwise()
-            status_controller.pop(self.status_context)
         else:
             document_model = self.application.get_document_model()
-            page_iter = document_model.get_iter_first()
-            i = 1
-            while page_iter:
-                page_model = document_model.get_value(page_iter, 0)
-                status_controller.push(self.status_context, 'Rotating page %i...' % i)
-                nostaples.utils.gui.flush_pending_events()
-                page_model.rotate_counter_clockwise()
-                status_controller.pop(self.status_context)
-                page_iter = document_model.iter_next(page_iter)
-                i = i + 1            
+            
+            document_model.begin_update()
+            try:
+                page_iter = document_model.get_iter_first()
+                while page_iter:
+                    page_model = document_model.get_value(page_iter, 0)
+                    page_model.rotate_counter_clockwise()
+                    page_iter = document_model.iter_next(page_iter)
+            finally:
+                document_model.end_update()
     
     def rotate_clockwise(self, rotate_all):
         """
         Rotate the page clockwise.
         """
-        status_controller = self.application.get_status_controller()
-        
         if not rotate_all:
             page_model = self.application.get_current_page_model()
-            status_controller.push(self.status_context, 'Rotating current page...')
-            nostaples.utils.gui.flush_pending_events()
             page_model.rotate_clockwise()
-            status_controller.pop(self.status_context)
         else:
             document_model = self.application.get_document_model()
-            page_iter = document_model.get_iter_first()
-            i = 1
-            while page_iter:
-                page_model = document_model.get_value(page_iter, 0)
-                status_controller.push(self.status_context, 'Rotating page %i...' % i)
-                nostaples.utils.gui.flush_pending_events()
-                page_model.rotate_clockwise()
-                status_controller.pop(self.status_context)
-                page_iter = document_model.iter_next(page_iter)
-                i = i + 1  
+            
+            document_model.begin_update()
+            try:
+                page_iter = document_model.get_iter_first()
+                while page_iter:
+                    page_model = document_model.get_value(page_iter, 0)
+                    page_model.rotate_clockwise()
+                    page_iter = document_model.iter_next(page_iter)
+            finally:
+                document_model.end_update()
             
     def goto_first_page(self):
         """Select the first scanned page."""
@@ -469,4 +489,69 @@ class DocumentController(Controller):
         document_model = self.application.get_document_model()
         document_view = self.application.get_document_view()
         
-        document_view['thumbnails_tree_view'].get_selection().select_path(len(document_model) - 1)
\ No newline at end of file
+        document_view['thumbnails_tree_view'].get_selection().select_path(len(document_model) - 1)
+        
+    # PRIVATE METHODS
+    
+    def _schedule_adjustments(self):
+        """
+        Schedule the adjustment slider values to be previewed once the
+        main loop is idle, and (re)start the timeout after which they are
+        applied at full resolution.
+        
+        However many values a dragged slider passes through between
+        redraws, only the latest is previewed, and only the values it
+        settles on are applied.  Transforming full-size scans on every
+        slider movement would make dragging a slider unusably slow.
+        """
+        if self.updating_sliders:
+            return
+        
+        if self.preview_source_id is None:
+            self.preview_source_id = gobject.idle_add(
+                self._preview_adjustments)
+        
+        if self.adjustments_timeout_id is not None:
+            gobject.source_remove(self.adjustments_timeout_id)
+        
+        self.adjustments_timeout_id = gobject.timeout_add(
+            constants.ADJUSTMENT_SETTLE_DELAY, self._on_adjustments_settled)
+        
+    def _cancel_scheduled_adjustments(self):
+        """
+        Drop any preview or application of the adjustment slider values
+        that has been scheduled but not yet run.
+        """
+        if self.preview_source_id is not None:
+            gobject.source_remove(self.preview_source_id)
+            self.preview_source_id = None
+        
+        if self.adjustments_timeout_id is not None:
+            gobject.source_remove(self.adjustments_timeout_id)
+            self.adjustments_timeout_id = None
+        
+    def _preview_adjustments(self):
+        """
+        Show the current adjustment slider values on a screen resolution
+        proxy of the current page.
+        """
+        document_view = self.application.get_document_view()
+        page_controller = self.application.get_page_controller()
+        
+        self.preview_source_id = None
+        
+        page_controller.preview_adjustments(
+            document_view['brightness_scale'].get_value(),
+            document_view['contrast_scale'].get_value(),
+            document_view['sharpness_scale'].get_value())
+        
+        return False
+        
+    def _on_adjustments_settled(self):
+        """
+        Apply the adjustments once the sliders have stopped moving.
+        """
+        self.adjustments_timeout_id = None
+        self.commit_adjustments()
+        
+        return False
\ No newline at end of file
@@ -51,11 +51,18 @@ class MainController(Controller):
         
         application.get_document_model().register_observer(self)
         application.get_preferences_model().register_observer(self)
+        application.get_save_model().register_observer(self)
+        
+        application.get_transform_pool().connect(
+            'aborted', self.on_transform_pool_aborted)
         
         status_controller = application.get_status_controller()
         self.status_context = \
             status_controller.get_context_id(self.__class__.__name__)
         
+        # Set if the application is to exit once the current save ends
+        self.quit_pending = False
+        
         self.log = logging.getLogger(self.__class__.__name__)
         self.log.debug('Created.')
 
@@ -76,6 +83,7 @@ class MainController(Controller):
         self.adapt('show_statusbar', 'show_statusbar_menu_item')
         self.adapt('show_thumbnails', 'show_thumbnails_menu_item')
         self.adapt('show_adjustments', 'show_adjustments_menu_item')
+        self.adapt('show_continuous', 'show_continuous_menu_item')
         self.adapt('rotate_all_pages', 'rotate_all_pages_menu_item')   
         self.log.debug('Adapters registered.')
         
@@ -83,6 +91,17 @@ class MainController(Controller):
     
     # Menu Items
         
+    def on_scan_window_delete_event(self, window, event):
+        """
+        Keep the window open while the document is being saved, as the
+        application will not exit until then.  See L{quit}.
+        """
+        if self.application.get_save_model().save_in_progress:
+            self.quit()
+            return True
+        
+        return False
+        
     def on_scan_window_destroy(self, window):
         """Exits the application."""
         self.quit()
@@ -281,16 +300,10 @@ class MainController(Controller):
     def on_quick_save_button_clicked(self, button):
         """
         Show the save dialog.  If the user completes a save
-        then disable the quick save button until another
-        page is scanned.
+        then the quick save button is disabled, when the document
+        is cleared, until another page is scanned.
         """
-        main_view = self.application.get_main_view()
-        document_model = self.application.get_document_model()
-        
         self.application.show_save_dialog()
-        
-        if document_model.count == 0:
-            main_view['quick_save_button'].set_sensitive(False)
     
     # MainModel PROPERTY CALLBACKS
     
@@ -336,6 +349,19 @@ class MainController(Controller):
         
         document_controller.toggle_adjustments_visible(new_value)    
         
+    def property_show_continuous_value_change(self, model, old_value, new_value):
+        """
+        Switch between previewing the current page and scrolling through
+        all pages.
+        """
+        document_controller = self.application.get_document_controller()
+        main_view = self.application.get_main_view()
+        
+        menu_item = main_view['show_continuous_menu_item']
+        menu_item.set_active(new_value)
+        
+        document_controller.toggle_continuous_visible(new_value)
+        
     def property_active_scanner_value_change(self, model, old_value, new_value):
         """
         Update the menu and valid scanner options to match the new device.
@@ -516,8 +542,26 @@ class MainController(Controller):
     
     def property_count_value_change(self, model, old_value, new_value):
         """Toggle available controls."""
+        main_view = self.application.get_main_view()
+        
+        if new_value == 0:
+            main_view['quick_save_button'].set_sensitive(False)
+        
+        self._toggle_document_controls()
+        
+    # SaveModel PROPERTY CALLBACKS
+    
+    def property_save_in_progress_value_change(self, model, old_value, new_value):
+        """
+        Disable or re-enable scan and document controls, and exit if that
+        was waiting for the save to end.
+        """
+        self._toggle_scan_controls()
         self._toggle_document_controls()
         
+        if not new_value and self.quit_pending:
+            self.quit()
+        
     # PreferencesModel PROPERTY CALLBACKS
     
     def property_toolbar_style_value_change(self, model, old_value, new_value):
@@ -633,10 +677,29 @@ class MainController(Controller):
         self.on_update_available_scanners_thread_finished(update_thread, [])
         raise exc_info[0], exc_info[1], exc_info[2]
         
+    def on_transform_pool_aborted(self, transform_pool, exc_info):
+        """
+        Reraise an exception from a page transformation so that it can be
+        caught by the sys.excepthook.
+        """
+        raise exc_info[0], exc_info[1], exc_info[2]
+        
     # PUBLIC METHODS
         
     def quit(self):
-        """Exits the application."""
+        """
+        Exits the application, or if a document is being saved, exits as
+        soon as the save has finished or been cancelled.
+        """
+        status_controller = self.application.get_status_controller()
+        
+        if self.application.get_save_model().save_in_progress:
+            self.quit_pending = True
+            status_controller.pop(self.status_context)
+            status_controller.push(self.status_context, 
+                'Waiting for the document to be saved before quitting...')
+            return
+        
         self.log.debug('Quit.')
         gtk.main_quit()
         
@@ -693,8 +756,12 @@ class MainController(Controller):
         """Toggle whether or not the scan controls or accessible."""
         main_model = self.application.get_main_model()
         main_view = self.application.get_main_view()
+        save_model = self.application.get_save_model()
         
-        if main_model.scan_in_progress or main_model.updating_available_scanners:
+        # Scanned pages would be cleared with the document being saved
+        if main_model.scan_in_progress or \
+            main_model.updating_available_scanners or \
+            save_model.save_in_progress:
             main_view.set_scan_controls_sensitive(False)
             main_view.set_refresh_scanner_controls_sensitive(False)
         else:
@@ -710,9 +777,13 @@ class MainController(Controller):
         """
         main_model = self.application.get_main_model()
         main_view = self.application.get_main_view()
+        save_model = self.application.get_save_model()
         
-        # Disable all controls when the scanner is in use
-        if main_model.scan_in_progress or main_model.updating_available_scanners:
+        # Disable all controls when the scanner is in use or the document
+        # is being saved
+        if main_model.scan_in_progress or \
+            main_model.updating_available_scanners or \
+            save_model.save_in_progress:
             main_view.set_file_controls_sensitive(False)
             main_view.set_delete_controls_sensitive(False)
             main_view.set_zoom_controls_sensitive(False)
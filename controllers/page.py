@@ -21,11 +21,17 @@ between the L{PageModel} and L{PageView}.
 """
 
 import logging
+import math
 
+import gobject
 import gtk
 from gtkmvc.controller import Controller
+import Image
 
 from nostaples import constants
+from nostaples.utils.cache import LRUCache
+from nostaples.utils.graphics import *
+from nostaples.utils.workers import BULK_PRIORITY
 
 class PageController(Controller):
     """
@@ -49,9 +55,31 @@ class PageController(Controller):
 
         self.log = logging.getLogger(self.__class__.__name__)
         
-        # The preview pixbuf is cached so it can be rerendered without
-        # reapplying zoom transformations.
-        self.preview_pixbuf = None
+        # Scaled tiles of the preview are cached so that they can be
+        # redrawn without reapplying zoom transformations.
+        self.tile_cache = LRUCache(constants.PREVIEW_TILE_CACHE_SIZE)
+        
+        # Tiles waiting to be rendered with the preview mode's filter, see
+        # L{_get_tile}, and those being rendered.  Each tile is submitted to
+        # the transform pool as a job of its own, on behalf of the pair of
+        # the tile cache and its key, so that tiles are drawn as they
+        # finish and none are lost when more are queued.
+        self.unrefined_tiles = {}
+        self.refining_tiles = set()
+        self.refine_generation = 0
+        self.refine_source_id = None
+        # Set while a refinement job is rendering the display image, which
+        # is too slow to restart for each tile exposed meanwhile
+        self.refining_display_image = False
+        # Set while the scroll wheel is zooming the preview
+        self.wheel_timeout_id = None
+        
+        # Pages adjacent to the current one whose display images are kept
+        # loaded, see L{set_current_page_model}.  Prefetch jobs are
+        # submitted to the transform pool on behalf of prefetch_token.
+        self.prefetched_pages = []
+        self.prefetch_token = object()
+        self.prefetch_generation = 0
         
         # Non persistent settings that apply to all scanned pages
         self.preview_width = 0
@@ -59,13 +87,27 @@ class PageController(Controller):
         self.preview_zoom = 1.0
         self.preview_is_best_fit = False
         
+        # Size of the scaled page and its offset within the layout
+        self.preview_size = (0, 0)
+        self.preview_offset = (0, 0)
+        
         self.preview_zoom_rect_color = \
             gtk.gdk.colormap_get_system().alloc_color(
                 gtk.gdk.Color(65535, 0, 0), False, True)
+        # Drawn in place of tiles which have not been rendered yet
+        self.preview_placeholder_color = \
+            gtk.gdk.colormap_get_system().alloc_color(
+                gtk.gdk.Color(32768, 32768, 32768), False, True)
+                
+        # Incremented for each adjustment proxy so that the pool can drop
+        # those which have been superseded.
+        self.proxy_generation = 0
                 
         # Reusable temp vars to hold the start point of a mouse drag action.
         self.zoom_drag_start_x = 0
         self.zoom_drag_start_y = 0
+        # The (x, y, width, height) of the zoom rectangle last drawn
+        self.zoom_rect = None
         self.move_drag_start_x = 0
         self.move_drag_start_y = 0
         
@@ -86,7 +128,7 @@ class PageController(Controller):
         Begins a drag or zoom event.
         """        
         # Do not process mouse events if nothing is visible
-        if not self.model.pixbuf:
+        if not self.model.has_image:
             return
         
         if event.button == 1:
@@ -99,22 +141,24 @@ class PageController(Controller):
         Update the preview during a drag or zoom event.
         """
         # Do not process mouse events if nothing is visible
-        if not self.model.pixbuf:
+        if not self.model.has_image:
             return
         
         # Handle both hint events and routine notifications
         # See: http://www.pygtk.org/pygtk2tutorial/sec-EventHandling.html
+        # Querying the pointer also requests the next motion event, so
+        # motions are compressed to one per redraw
         if event.is_hint:
-            mouse_state = event.window.get_pointer()[2]
+            x, y, mouse_state = event.window.get_pointer()
         else:
-            mouse_state = event.state
+            x, y, mouse_state = event.x, event.y, event.state
             
         # Move
         if (mouse_state & gtk.gdk.BUTTON1_MASK):
             self._update_move(event.x_root, event.y_root)
         # Zoom
         elif (mouse_state & gtk.gdk.BUTTON3_MASK):
-            self._update_zoom(event.x, event.y)
+            self._update_zoom(x, y)
         
         # NB: These need to be updated even if the button wasn't pressed
         self.move_drag_start_x = event.x_root
@@ -125,7 +169,7 @@ class PageController(Controller):
         Ends a drag or zoom event.
         """
         # Do not process mouse events if nothing is visible
-        if not self.model.pixbuf:
+        if not self.model.has_image:
             return
         
         # Move
@@ -137,9 +181,36 @@ class PageController(Controller):
     
     def on_page_view_image_layout_scroll_event(self, widget, event):
         """
-        TICKET #48
+        Zooms the preview in or out around the pointer.
+        
+        While the wheel is turning, tiles are only rendered with the
+        nearest neighbour filter, their refinement being held back until
+        it has stopped for PREVIEW_WHEEL_SETTLE_DELAY milliseconds.
         """
-        pass
+        # Do not process mouse events if nothing is visible
+        if not self.model.has_image:
+            return
+        
+        if event.direction == gtk.gdk.SCROLL_UP:
+            factor = constants.PREVIEW_WHEEL_ZOOM_FACTOR
+        elif event.direction == gtk.gdk.SCROLL_DOWN:
+            factor = 1 / constants.PREVIEW_WHEEL_ZOOM_FACTOR
+        else:
+            return
+        
+        if self.wheel_timeout_id is not None:
+            gobject.source_remove(self.wheel_timeout_id)
+        self.wheel_timeout_id = gobject.timeout_add(
+            constants.PREVIEW_WHEEL_SETTLE_DELAY, self._on_wheel_settled)
+        
+        self._zoom_at(factor, event.x, event.y)
+    
+    def on_page_view_image_layout_expose_event(self, widget, event):
+        """
+        Draws the exposed part of the preview.
+        """
+        if event.window == widget.bin_window:
+            self._draw_tiles(event.area)
     
     def on_page_view_image_layout_size_request(self, widget, size):
         size.width = 1
@@ -163,7 +234,16 @@ class PageController(Controller):
     
     # PROPERTY CALLBACKS
     
-    def property_pixbuf_value_change(self, model, old_value, new_value):
+    def property_display_image_value_change(self, model, old_value, new_value):
+        """
+        Update the preview display when the display image is replaced with a
+        newly adjusted one.  Loading and unloading it changes nothing that
+        is displayed.
+        """
+        if old_value is not None and new_value is not None:
+            self._update_preview()
+        
+    def property_rotation_value_change(self, model, old_value, new_value):
         """Update the preview display."""
         self._update_preview()
         
@@ -183,16 +263,96 @@ class PageController(Controller):
         """
         return self.model
     
-    def set_current_page_model(self, page_model):
+    def set_current_page_model(self, page_model, neighbour_page_models=None):
         """
         Sets the PageModel that is currently being displayed in the preview area.
+        
+        Only the displayed page keeps its display image loaded, along with
+        those of the neighbouring pages which fit in the prefetch memory
+        budget.  The displayed page's is not loaded until a tile of the
+        preview is found not to be cached, so returning to a page that
+        was already viewed neither adjusts nor scales anything.
+        
+        @param neighbour_page_models: The pages most likely to be
+                                        displayed next, in order of
+                                        likelihood.  Their display images
+                                        and visible tiles are prefetched
+                                        in the background.  None
+                                        if there are none.
         """
-        self.model.unregister_observer(self)
+        if neighbour_page_models is None:
+            neighbour_page_models = []
+        
+        previous_page_model = self.model
+        
+        previous_page_model.unregister_observer(self)
         self.model = page_model
         self.model.register_observer(self)
         
+        self._prefetch_pages(neighbour_page_models)
+        
+        if (previous_page_model is not page_model and 
+            previous_page_model not in self.prefetched_pages):
+            previous_page_model.unload_display_image()
+        
         self._update_preview()
     
+    def preview_adjustments(self, brightness, contrast, sharpness):
+        """
+        Shows the visible part of the current page with the given
+        adjustments, rendered at screen resolution on a worker thread.
+        The page itself is not changed, this is only meant to give
+        immediate feedback while an adjustment slider is being dragged.
+        """
+        page_view = self.application.get_page_view()
+        transform_pool = self.application.get_transform_pool()
+        
+        if not self.model.has_image:
+            return
+        
+        # Restore the real preview if the values are back where they started
+        if (brightness == self.model.brightness and
+            contrast == self.model.contrast and
+            sharpness == self.model.sharpness):
+            transform_pool.cancel(self)
+            page_view['page_view_image_layout'].queue_draw()
+            return
+        
+        target_width, target_height = self.preview_size
+        shift_x, shift_y = self.preview_offset
+        
+        # Determine the visible part of the preview
+        horizontal_adjustment = \
+            page_view['page_view_image_layout'].get_hadjustment()
+        vertical_adjustment = \
+            page_view['page_view_image_layout'].get_vadjustment()
+        
+        left = max(int(horizontal_adjustment.value) - shift_x, 0)
+        upper = max(int(vertical_adjustment.value) - shift_y, 0)
+        right = min(left + self.preview_width, target_width)
+        lower = min(upper + self.preview_height, target_height)
+        
+        if right <= left or lower <= upper:
+            return
+        
+        # Transform it to page coordinates
+        scale = float(self.model.width) / target_width
+        region = (
+            int(left * scale), int(upper * scale), 
+            int(right * scale), int(lower * scale))
+        
+        # Refined tiles would be drawn over the proxy
+        self._cancel_refinement()
+        
+        self.proxy_generation += 1
+        transform_pool.submit(
+            self, self.proxy_generation, 
+            lambda pixbuf: self._draw_proxy(
+                pixbuf, left + shift_x, upper + shift_y),
+            self.model.render_proxy, (brightness, contrast, sharpness),
+            self.model.rotation, region, (right - left, lower - upper),
+            Image.BILINEAR)
+    
     def zoom_in(self):
         """
         Zooms the preview image in.
@@ -256,7 +416,7 @@ class PageController(Controller):
            page_view['page_view_vertical_scrollbar'].get_property('visible'):
                return
            
-        page_view['page_view_image'].get_parent_window().set_cursor(
+        page_view['page_view_image_layout'].bin_window.set_cursor(
             gtk.gdk.Cursor(gtk.gdk.FLEUR))
                 
     def _begin_zoom(self, x, y):
@@ -265,12 +425,78 @@ class PageController(Controller):
         """
         page_view = self.application.get_page_view()
         
-        page_view['page_view_image'].get_parent_window().set_cursor(
+        page_view['page_view_image_layout'].bin_window.set_cursor(
             gtk.gdk.Cursor(gtk.gdk.CROSS))
             
         self.zoom_drag_start_x = x
         self.zoom_drag_start_y = y
+        self.zoom_rect = None
+            
+    def _zoom_at(self, factor, x, y):
+        """
+        Multiplies the zoom by factor, keeping the point of the page at
+        x, y in layout coordinates under the same point of the display.
+        
+        The zoom is bounded by the best fit below and PREVIEW_ZOOM_MAX
+        above.  Zooming out to the best fit switches to best fit mode.
+        """
+        page_view = self.application.get_page_view()
+        
+        horizontal_adjustment = \
+            page_view['page_view_image_layout'].get_hadjustment()
+        vertical_adjustment = \
+            page_view['page_view_image_layout'].get_vadjustment()
+        
+        shift_x, shift_y = self.preview_offset
+        
+        # The point of the page, and where it is shown in the display
+        page_x = (x - shift_x) / self.preview_zoom
+        page_y = (y - shift_y) / self.preview_zoom
+        display_x = x - horizontal_adjustment.value
+        display_y = y - vertical_adjustment.value
+        
+        best_fit_zoom = min(self._get_best_fit_zoom(self.model), 
+            constants.PREVIEW_ZOOM_MAX)
+        zoom = min(self.preview_zoom * factor, constants.PREVIEW_ZOOM_MAX)
+        
+        if zoom <= best_fit_zoom:
+            if self.preview_is_best_fit:
+                return
+            
+            self.preview_is_best_fit = True
+        else:
+            if zoom == self.preview_zoom:
+                return
             
+            self.preview_zoom = zoom
+            self.preview_is_best_fit = False
+        
+        self._update_preview()
+        
+        shift_x, shift_y = self.preview_offset
+        target_width, target_height = self.preview_size
+        
+        new_x = shift_x + page_x * self.preview_zoom - display_x
+        new_x = min(new_x, target_width - horizontal_adjustment.page_size)
+        horizontal_adjustment.set_value(max(new_x, 0))
+        
+        new_y = shift_y + page_y * self.preview_zoom - display_y
+        new_y = min(new_y, target_height - vertical_adjustment.page_size)
+        vertical_adjustment.set_value(max(new_y, 0))
+        
+    def _on_wheel_settled(self):
+        """
+        Redraws the preview, so that the tiles drawn while the scroll
+        wheel was zooming are refined.
+        """
+        page_view = self.application.get_page_view()
+        
+        self.wheel_timeout_id = None
+        
+        page_view['page_view_image_layout'].queue_draw()
+        
+        return False
+    
     def _update_move(self, x, y):
         """
         Moves/drags the preview in response to mouse movement.
@@ -301,6 +527,9 @@ class PageController(Controller):
         """
         Renders a box around the zoom region the user has specified
         by dragging the mouse.
+        
+        Only the edges of the previously drawn box are repainted to
+        erase it, rather than the whole preview.
         """
         page_view = self.application.get_page_view()
     
@@ -315,27 +544,50 @@ class PageController(Controller):
         if end_y < start_y:
             start_y, end_y = end_y, start_y
         
-        width = end_x - start_x
-        height = end_y - start_y
-
-        page_view['page_view_image'].set_from_pixbuf(self.preview_pixbuf)
-        page_view['page_view_image'].get_parent_window().invalidate_rect(
-            (0, 0, self.preview_width, self.preview_height), 
-            False)
-        page_view['page_view_image'].get_parent_window(). \
+        zoom_rect = (int(start_x), int(start_y), 
+            int(end_x - start_x), int(end_y - start_y))
+        
+        if zoom_rect == self.zoom_rect:
+            return
+        
+        self._erase_zoom_rect()
+        page_view['page_view_image_layout'].bin_window. \
             process_updates(False)
         
         graphics_context = \
-            page_view['page_view_image'].get_parent_window().new_gc(
+            page_view['page_view_image_layout'].bin_window.new_gc(
                 foreground=self.preview_zoom_rect_color, 
                 line_style=gtk.gdk.LINE_ON_OFF_DASH, 
-                line_width=2)
+                line_width=constants.PREVIEW_ZOOM_RECT_WIDTH)
             
-        page_view['page_view_image'].get_parent_window().draw_rectangle(
-            graphics_context, 
-            False, 
-            int(start_x), int(start_y), 
-            int(width), int(height))
+        page_view['page_view_image_layout'].bin_window.draw_rectangle(
+            graphics_context, False, *zoom_rect)
+        
+        self.zoom_rect = zoom_rect
+    
+    def _erase_zoom_rect(self):
+        """
+        Invalidates the edges of the zoom rectangle last drawn, if any,
+        so that the preview under them is repainted.
+        """
+        page_view = self.application.get_page_view()
+        
+        if self.zoom_rect is None:
+            return
+        
+        x, y, width, height = self.zoom_rect
+        # Enough to cover the line on either side of the edge
+        margin = constants.PREVIEW_ZOOM_RECT_WIDTH
+        
+        for edge in [
+            (x - margin, y - margin, width + 2 * margin, 2 * margin),
+            (x - margin, y + height - margin, width + 2 * margin, 2 * margin),
+            (x - margin, y - margin, 2 * margin, height + 2 * margin),
+            (x + width - margin, y - margin, 2 * margin, height + 2 * margin)]:
+            page_view['page_view_image_layout'].bin_window.invalidate_rect(
+                edge, False)
+        
+        self.zoom_rect = None
             
     def _end_move(self):
         """
@@ -343,13 +595,15 @@ class PageController(Controller):
         """
         page_view = self.application.get_page_view()
     
-        page_view['page_view_image'].get_parent_window().set_cursor(None)
+        page_view['page_view_image_layout'].bin_window.set_cursor(None)
         
     def _end_zoom(self, x, y):
         """
         Calculates and applies zoom to the preview and updates the display.
         """   
         page_view = self.application.get_page_view()
+        
+        self._erase_zoom_rect()
          
         # Transform to absolute coords
         start_x = self.zoom_drag_start_x / self.preview_zoom
@@ -416,50 +670,52 @@ class PageController(Controller):
         page_view['page_view_image_layout'].get_vadjustment().set_value(
             transform_y)
         
-        page_view['page_view_image'].get_parent_window().set_cursor(None)        
+        page_view['page_view_image_layout'].bin_window.set_cursor(None)        
+        
+    def _draw_proxy(self, pixbuf, x, y):
+        """
+        Draws an adjustment proxy over the preview.  It is drawn directly
+        to the window so that the cached preview tiles are left intact.
+        Nothing is drawn if the page was discarded while it was rendered.
+        """
+        page_view = self.application.get_page_view()
+        
+        if pixbuf is None:
+            return
+        
+        page_view['page_view_image_layout'].bin_window.draw_pixbuf(
+            None, pixbuf, 0, 0, x, y)
         
     def _update_preview(self):
         """
-        Render the current page to the preview display.
+        Lay out the current page in the preview display.
+        
+        Nothing is scaled here.  The preview is drawn a tile at a time
+        as it is exposed, so only the visible part of the page is ever
+        scaled, no matter the zoom.  See L{_draw_tiles}.
         """
         page_view = self.application.get_page_view()
-        preferences_model = self.application.get_preferences_model()
         status_controller = self.application.get_status_controller()
         
-        # Short circuit if the PageModel does not have a pixbuf 
+        # Any adjustment proxies or tile refinements in flight were 
+        # rendered for the old preview
+        self._cancel_refinement()
+        self.application.get_transform_pool().cancel(self)
+        
+        # Short circuit if the PageModel does not have an image 
         # (such as the null page).
-        if not self.model.pixbuf:
-            page_view['page_view_image'].clear()
+        if not self.model.has_image:
+            self.preview_size = (0, 0)
+            page_view['page_view_image_layout'].queue_draw()
             status_controller.pop(self.status_context)
             return
         
-        # Fit if necessary
-        if self.preview_is_best_fit:
-            width_ratio = float(self.model.width) / self.preview_width
-            height_ratio = float(self.model.height) / self.preview_height
-            
-            if width_ratio < height_ratio:
-                self.preview_zoom =  1 / float(height_ratio)
-            else:
-                self.preview_zoom =  1 / float(width_ratio)
+        self.preview_zoom = self._get_preview_zoom(self.model)
         
-        # Zoom if necessary
-        if self.preview_zoom != 1.0:
-            target_width = \
-                int(self.model.width * self.preview_zoom)
-            target_height = \
-                int(self.model.height * self.preview_zoom)
-            
-            gtk_scale_mode = \
-                constants.PREVIEW_MODES[preferences_model.preview_mode]
-            
-            self.preview_pixbuf = self.model.pixbuf.scale_simple(
-                target_width, target_height, gtk_scale_mode)
-        else:
-            target_width = self.model.width
-            target_height = self.model.height
+        target_width = int(self.model.width * self.preview_zoom)
+        target_height = int(self.model.height * self.preview_zoom)
         
-            self.preview_pixbuf = self.model.pixbuf
+        self.preview_size = (target_width, target_height)
         
         # Resize preview area
         page_view['page_view_image_layout'].set_size(
@@ -472,8 +728,7 @@ class PageController(Controller):
         shift_y = int((self.preview_height - target_height) / 2)
         if shift_y < 0:
             shift_y = 0
-        page_view['page_view_image_layout'].move(
-            page_view['page_view_image'], shift_x, shift_y)
+        self.preview_offset = (shift_x, shift_y)
         
         # Show/hide scrollbars
         if target_width > self.preview_width:
@@ -487,8 +742,487 @@ class PageController(Controller):
             page_view['page_view_vertical_scrollbar'].hide()
         
         # Render updated preview
-        page_view['page_view_image'].set_from_pixbuf(self.preview_pixbuf)
+        page_view['page_view_image_layout'].queue_draw()
         
         # Update status
         status_controller.pop(self.status_context)
-        status_controller.push(self.status_context, "%.0f%%" % (self.preview_zoom * 100))
\ No newline at end of file
+        status_controller.push(self.status_context, "%.0f%%" % (self.preview_zoom * 100))
+        
+    def _get_preview_zoom(self, page_model):
+        """
+        Get the zoom a page would be previewed at, fitting it to the
+        preview display if necessary.
+        """
+        if not self.preview_is_best_fit:
+            return self.preview_zoom
+        
+        return self._get_best_fit_zoom(page_model)
+    
+    def _get_best_fit_zoom(self, page_model):
+        """
+        Get the zoom at which a page fits within the preview display.
+        """
+        width_ratio = float(page_model.width) / self.preview_width
+        height_ratio = float(page_model.height) / self.preview_height
+        
+        if width_ratio < height_ratio:
+            return 1 / float(height_ratio)
+        else:
+            return 1 / float(width_ratio)
+        
+    def _draw_tiles(self, area):
+        """
+        Draw the tiles of the preview which intersect an exposed area of
+        the layout.
+        """
+        page_view = self.application.get_page_view()
+        
+        target_width, target_height = self.preview_size
+        shift_x, shift_y = self.preview_offset
+        tile_size = constants.PREVIEW_TILE_SIZE
+        
+        # Transform the area to preview coordinates
+        left = max(area.x - shift_x, 0)
+        upper = max(area.y - shift_y, 0)
+        right = min(area.x + area.width - shift_x, target_width)
+        lower = min(area.y + area.height - shift_y, target_height)
+        
+        if right <= left or lower <= upper:
+            return
+        
+        window = page_view['page_view_image_layout'].bin_window
+        graphics_context = None
+        
+        for row in range(upper // tile_size, (lower - 1) // tile_size + 1):
+            for column in range(left // tile_size, (right - 1) // tile_size + 1):
+                tile = self._get_tile(column, row)
+                x = shift_x + column * tile_size
+                y = shift_y + row * tile_size
+                
+                if tile is not None:
+                    window.draw_pixbuf(None, tile, 0, 0, x, y)
+                    continue
+                
+                if graphics_context is None:
+                    graphics_context = window.new_gc(
+                        foreground=self.preview_placeholder_color)
+                
+                window.draw_rectangle(graphics_context, True, x, y, 
+                    min(tile_size, target_width - column * tile_size), 
+                    min(tile_size, target_height - row * tile_size))
+        
+    def _get_tile(self, column, row):
+        """
+        Get a tile of the preview if it is cached.  Otherwise it is queued
+        to be rendered in the background, see L{_queue_refinement}, and
+        its nearest neighbour counterpart is returned if that is cached,
+        or None if not, in which case a placeholder is drawn.  Nothing is
+        ever scaled on the main thread.
+        
+        Tiles are cached by page, the adjustments and rotation they were
+        rendered with, zoom and filter, so that changing any of them
+        never shows a stale tile, while flipping between pages or modes
+        already viewed shows the cached tiles as they were.
+        
+        While the scroll wheel is zooming tiles are rendered with the
+        nearest neighbour filter, which is fast enough to keep up with
+        it, whatever the preview mode.
+        """
+        preferences_model = self.application.get_preferences_model()
+        resample = constants.PREVIEW_MODES[preferences_model.preview_mode]
+        
+        if self.wheel_timeout_id is not None:
+            resample = Image.NEAREST
+        
+        key = self._get_tile_key(
+            self.model, self.preview_zoom, resample, column, row)
+        tile = self.tile_cache.get(key)
+        
+        if tile is not None:
+            return tile
+        
+        self._queue_refinement(key, self._get_tile_layout(
+            self.model, self.preview_zoom, self.preview_size, column, row))
+        
+        return self.tile_cache.get(self._get_tile_key(
+            self.model, self.preview_zoom, Image.NEAREST, column, row))
+    
+    def _get_tile_key(self, page_model, zoom, resample, column, row):
+        """
+        Get the key a tile of a page's preview is cached under.
+        """
+        return (page_model, page_model.display_generation, 
+            page_model.rotation, zoom, resample, column, row)
+    
+    def _get_tile_layout(self, page_model, zoom, preview_size, column, row):
+        """
+        Determine which part of a page a tile of its preview shows.
+        
+        @return: A (region, size, box) tuple, where region is the box
+                    of the page to scale to size and box is the part of
+                    the scaled region that makes up the tile.
+        """
+        target_width, target_height = preview_size
+        tile_size = constants.PREVIEW_TILE_SIZE
+        
+        left = column * tile_size
+        upper = row * tile_size
+        right = min(left + tile_size, target_width)
+        lower = min(upper + tile_size, target_height)
+        
+        # Scale the whole page pixels covering the tile, then trim the
+        # result to it, so that adjacent tiles line up exactly
+        region = (
+            int(math.floor(left / zoom)), 
+            int(math.floor(upper / zoom)),
+            min(int(math.ceil(right / zoom)), page_model.width),
+            min(int(math.ceil(lower / zoom)), page_model.height))
+        
+        offset_x = int(round(left - region[0] * zoom))
+        offset_y = int(round(upper - region[1] * zoom))
+        
+        scaled_size = (
+            max(int(math.ceil((region[2] - region[0]) * zoom)), 
+                offset_x + right - left),
+            max(int(math.ceil((region[3] - region[1]) * zoom)), 
+                offset_y + lower - upper))
+        
+        return (region, scaled_size, 
+            (offset_x, offset_y, right - left, lower - upper))
+        
+    def _render_tile(self, page_model, layout, resample, display_image=None):
+        """
+        Scale a tile of the preview.  May be run on a worker thread.
+        
+        @param layout: A tuple as returned by L{_get_tile_layout}.
+        @param display_image: See L{PageModel.render_region}.
+        @return: The tile's pixbuf, or None if the page's display image
+                    was unloaded.
+        """
+        region, scaled_size, box = layout
+        
+        pixbuf = page_model.render_region(
+            region, scaled_size, resample, display_image)
+        
+        if pixbuf is None:
+            return None
+        
+        return pixbuf.subpixbuf(*box)
+    
+    def _queue_refinement(self, key, layout):
+        """
+        Queue a tile to be rendered with the filter it is keyed by once
+        the main loop is idle, unless it is already being rendered, so
+        that all the tiles exposed at once are submitted together.
+        """
+        if key in self.refining_tiles:
+            return
+        
+        self.unrefined_tiles[key] = layout
+        
+        if self.refine_source_id is None:
+            self.refine_source_id = gobject.idle_add(self._refine_tiles)
+    
+    def _refine_tiles(self):
+        """
+        Submit each of the tiles waiting to be rendered to the transform
+        pool.
+        
+        If the page's display image is not loaded the tiles are instead
+        rendered by one job which renders the display image first, off
+        the main thread, and loads it when the job finishes.  Tiles queued
+        meanwhile are held back until then.
+        """
+        transform_pool = self.application.get_transform_pool()
+        
+        self.refine_source_id = None
+        
+        if not self.unrefined_tiles or self.refining_display_image:
+            return False
+        
+        tiles = self.unrefined_tiles.items()
+        self.unrefined_tiles = {}
+        self.refining_tiles.update([key for key, layout in tiles])
+        
+        if self.model.display_image is None:
+            self.refining_display_image = True
+            
+            self.refine_generation += 1
+            transform_pool.submit(
+                self.tile_cache, self.refine_generation, 
+                self._on_tiles_refined, self._render_refined_tiles, 
+                self.model, self.model.adjustment_generation, 
+                (self.model.brightness, self.model.contrast, 
+                    self.model.sharpness), 
+                tiles, self.refine_generation, 
+                errback=self._on_tiles_refine_failed)
+            
+            return False
+        
+        for key, layout in tiles:
+            self.refine_generation += 1
+            transform_pool.submit(
+                (self.tile_cache, key), self.refine_generation,
+                self._on_tile_refined, self._render_refined_tile,
+                self.model, key, layout, self.model.display_image)
+        
+        return False
+    
+    def _render_refined_tile(self, page_model, key, layout, display_image):
+        """
+        Render a tile with the filter it is keyed by.  Runs on a worker
+        thread.
+        
+        @return: A (key, tile) tuple, see L{_render_tile}.
+        """
+        return (key, self._render_tile(
+            page_model, layout, key[4], display_image))
+    
+    def _on_tile_refined(self, result):
+        """
+        Cache a rendered tile and draw it over its placeholder or nearest
+        neighbour counterpart.
+        """
+        preferences_model = self.application.get_preferences_model()
+        page_view = self.application.get_page_view()
+        
+        key, tile = result
+        
+        # The job is finished, so the pool need not track its owner
+        self.refining_tiles.discard(key)
+        self.application.get_transform_pool().cancel((self.tile_cache, key))
+        
+        if tile is None:
+            return
+        
+        self.tile_cache.put(key, tile)
+        
+        # A nearest neighbour tile rendered while the wheel was zooming
+        # must not be drawn over its refined counterpart
+        column, row = key[5:]
+        resample = constants.PREVIEW_MODES[preferences_model.preview_mode]
+        
+        if key[4] != resample and self._get_tile_key(self.model, 
+            self.preview_zoom, resample, column, row) in self.tile_cache:
+            return
+        
+        shift_x, shift_y = self.preview_offset
+        tile_size = constants.PREVIEW_TILE_SIZE
+        
+        page_view['page_view_image_layout'].bin_window.draw_pixbuf(
+            None, tile, 0, 0, 
+            shift_x + column * tile_size, shift_y + row * tile_size)
+    
+    def _render_refined_tiles(self, page_model, page_generation, settings, 
+        tiles, generation):
+        """
+        Render the display image, then tiles with the filter they are
+        keyed by.  Runs on a worker thread, giving up as soon as the job
+        is superseded.
+        """
+        transform_pool = self.application.get_transform_pool()
+        
+        display_image = page_model.render_display_image(settings)
+        
+        refined_tiles = []
+        
+        for key, layout in tiles:
+            if transform_pool.is_stale(self.tile_cache, generation):
+                break
+            
+            tile = self._render_tile(
+                page_model, layout, key[4], display_image)
+            
+            if tile is None:
+                break
+            
+            refined_tiles.append((key, tile))
+        
+        return (page_model, page_generation, display_image, refined_tiles)
+    
+    def _on_tiles_refined(self, result):
+        """
+        Load the display image the tiles were rendered from, then cache
+        the tiles and draw them over their placeholders.
+        """
+        page_view = self.application.get_page_view()
+        
+        page_model, page_generation, display_image, refined_tiles = result
+        
+        # No other tiles are rendered while the display image is, and
+        # those exposed meanwhile were held back
+        self.refining_tiles = set()
+        self.refining_display_image = False
+        
+        if self.unrefined_tiles and self.refine_source_id is None:
+            self.refine_source_id = gobject.idle_add(self._refine_tiles)
+        
+        if (page_model is not self.model or 
+            page_model.adjustment_generation != page_generation):
+            return
+        
+        if page_model.display_image is None:
+            page_model.load_display_image(display_image)
+            
+            # Tiles that were not part of this job can now be rendered
+            page_view['page_view_image_layout'].queue_draw()
+        
+        window = page_view['page_view_image_layout'].bin_window
+        shift_x, shift_y = self.preview_offset
+        tile_size = constants.PREVIEW_TILE_SIZE
+        
+        for key, tile in refined_tiles:
+            self.tile_cache.put(key, tile)
+            
+            column, row = key[5:]
+            window.draw_pixbuf(
+                None, tile, 0, 0, 
+                shift_x + column * tile_size, shift_y + row * tile_size)
+        
+    def _on_tiles_refine_failed(self, exc_info):
+        """
+        Stops holding back tiles if rendering the display image raised.
+        The error itself is reported by the transform pool.
+        """
+        self.refining_tiles = set()
+        self.refining_display_image = False
+        
+    def _cancel_refinement(self):
+        """
+        Drop all tiles waiting to be rendered, including any being
+        rendered.  They will be queued again if they are redrawn.
+        """
+        transform_pool = self.application.get_transform_pool()
+        
+        if self.refine_source_id is not None:
+            gobject.source_remove(self.refine_source_id)
+            self.refine_source_id = None
+        
+        self.unrefined_tiles = {}
+        self.refining_display_image = False
+        transform_pool.cancel(self.tile_cache)
+        
+        for key in self.refining_tiles:
+            transform_pool.cancel((self.tile_cache, key))
+        self.refining_tiles = set()
+        
+    def _prefetch_pages(self, page_models):
+        """
+        Keep the display images of the given pages loaded, in order, as
+        far as the prefetch memory budget allows, rendering those that are
+        not yet loaded and the tiles of their previews that would be
+        visible in the background.  Pages prefetched earlier which are no
+        longer wanted are unloaded.
+        """
+        preferences_model = self.application.get_preferences_model()
+        page_view = self.application.get_page_view()
+        transform_pool = self.application.get_transform_pool()
+        
+        transform_pool.cancel(self.prefetch_token)
+        
+        resample = constants.PREVIEW_MODES[preferences_model.preview_mode]
+        budget = constants.PREFETCH_MEMORY_BUDGET
+        
+        horizontal_value = \
+            page_view['page_view_image_layout'].get_hadjustment().value
+        vertical_value = \
+            page_view['page_view_image_layout'].get_vadjustment().value
+        
+        previously_prefetched_pages = self.prefetched_pages
+        self.prefetched_pages = []
+        jobs = []
+        
+        for page_model in page_models:
+            if (not page_model.has_image or 
+                page_model is self.model or
+                page_model.display_image_bytes > budget):
+                continue
+            
+            budget -= page_model.display_image_bytes
+            self.prefetched_pages.append(page_model)
+            
+            # Find the tiles that would be visible if the page was shown
+            # without scrolling the preview
+            zoom = self._get_preview_zoom(page_model)
+            preview_size = (
+                int(page_model.width * zoom), int(page_model.height * zoom))
+            
+            left = max(min(int(horizontal_value), 
+                preview_size[0] - self.preview_width), 0)
+            upper = max(min(int(vertical_value), 
+                preview_size[1] - self.preview_height), 0)
+            right = min(left + self.preview_width, preview_size[0])
+            lower = min(upper + self.preview_height, preview_size[1])
+            
+            tile_size = constants.PREVIEW_TILE_SIZE
+            tiles = []
+            
+            for row in range(upper // tile_size, (lower - 1) // tile_size + 1):
+                for column in range(left // tile_size, (right - 1) // tile_size + 1):
+                    key = self._get_tile_key(
+                        page_model, zoom, resample, column, row)
+                    
+                    if key not in self.tile_cache:
+                        tiles.append((key, self._get_tile_layout(
+                            page_model, zoom, preview_size, column, row)))
+            
+            if page_model.display_image is None or tiles:
+                jobs.append((page_model, page_model.adjustment_generation,
+                    (page_model.brightness, page_model.contrast, 
+                        page_model.sharpness), 
+                    page_model.display_image, tiles))
+        
+        for page_model in previously_prefetched_pages:
+            if (page_model is not self.model and 
+                page_model not in self.prefetched_pages):
+                page_model.unload_display_image()
+        
+        if jobs:
+            self.prefetch_generation += 1
+            transform_pool.submit(
+                self.prefetch_token, self.prefetch_generation, 
+                self._on_pages_prefetched, self._render_prefetched_pages, 
+                jobs, resample, self.prefetch_generation, 
+                priority=BULK_PRIORITY)
+        
+    def _render_prefetched_pages(self, jobs, resample, generation):
+        """
+        Render the display images and preview tiles of the pages being
+        prefetched.  Runs on a worker thread, giving up as soon as the job
+        is superseded.
+        """
+        transform_pool = self.application.get_transform_pool()
+        
+        results = []
+        
+        for page_model, page_generation, settings, display_image, tiles in jobs:
+            if transform_pool.is_stale(self.prefetch_token, generation):
+                break
+            
+            if display_image is None:
+                display_image = page_model.render_display_image(settings)
+            
+            rendered_tiles = []
+            for key, layout in tiles:
+                rendered_tiles.append((key, self._render_tile(
+                    page_model, layout, resample, display_image)))
+                
+            results.append(
+                (page_model, page_generation, display_image, rendered_tiles))
+            
+        return results
+    
+    def _on_pages_prefetched(self, results):
+        """
+        Load the prefetched display images and cache their tiles, unless
+        the pages' adjustments have changed or they are no longer wanted.
+        """
+        for page_model, page_generation, display_image, tiles in results:
+            if (page_model not in self.prefetched_pages or
+                page_model.adjustment_generation != page_generation):
+                continue
+            
+            page_model.load_display_image(display_image)
+            
+            for key, tile in tiles:
+                self.tile_cache.put(key, tile)
@@ -98,6 +98,14 @@ class PreferencesController(Controller):
         preferences_model.toolbar_style = \
             read_combobox(preferences_view['toolbar_style_combobox'])
             
+    def on_page_storage_combobox_changed(self, combobox):
+        """Update the page storage in the PreferencesModel."""
+        preferences_model = self.application.get_preferences_model()
+        preferences_view = self.application.get_preferences_view()
+        
+        preferences_model.page_storage = \
+            read_combobox(preferences_view['page_storage_combobox'])
+            
     def on_remove_from_blacklist_button_clicked(self, button):
         """
         Remove the currently selected blacklist device from the list.
@@ -202,6 +210,12 @@ class PreferencesController(Controller):
         if new_value == 'System Default':
             self.on_default_toolbar_style_changed(self.gconf_client)
     
+    def property_page_storage_value_change(self, model, old_value, new_value):
+        """Select the active page storage in the combobox."""
+        preferences_view = self.application.get_preferences_view()
+        
+        write_combobox(preferences_view['page_storage_combobox'], new_value)
+    
     def property_blacklisted_scanners_value_change(self, model, old_value, new_value):
         """Update blacklisted scanners liststore."""
         preferences_view = self.application.get_preferences_view()
@@ -23,17 +23,12 @@ between the L{SaveModel} and L{SaveView}.
 import logging
 import os
 import sys
-import tempfile
 
 import gtk
 from gtkmvc.controller import Controller
-import Image, ImageEnhance
-from reportlab.pdfgen.canvas import Canvas as PdfCanvas
-from reportlab.lib.pagesizes import landscape, portrait
-from reportlab.lib.pagesizes import inch as points_per_inch
 
 from nostaples import constants
-import nostaples.utils.gui
+from nostaples.utils.saving import SavePdfThread
 
 class SaveController(Controller):
     """
@@ -53,7 +48,13 @@ class SaveController(Controller):
         status_controller = application.get_status_controller()
         self.status_context = \
             status_controller.get_context_id(self.__class__.__name__)
-
+        # Saves outlast the dialog, so report their progress separately
+        self.save_status_context = \
+            status_controller.get_context_id(SavePdfThread.__name__)
+        
+        self.save_thread = None
+        self.cancel_event = None
+        
         self.log = logging.getLogger(self.__class__.__name__)
         self.log.debug('Created.')
 
@@ -126,15 +127,14 @@ class SaveController(Controller):
         """
         save_model = self.application.get_save_model()
         save_view = self.application.get_save_view()
-        main_view = self.application.get_main_view()
         
         save_view['save_dialog'].hide()
         
         if response != gtk.RESPONSE_ACCEPT:
             return
         
-        main_view['scan_window'].window.set_cursor(gtk.gdk.Cursor(gtk.gdk.WATCH))
-        nostaples.utils.gui.flush_pending_events()
+        # Don't lose slider changes that have not been applied yet
+        self.application.get_document_controller().commit_pending_adjustments()
         
         save_model.filename = save_view['save_dialog'].get_filename()
         filename_filter = save_view['save_dialog'].get_filter()
@@ -148,10 +148,30 @@ class SaveController(Controller):
             
         self._update_saved_keywords()
             
-        main_view['scan_window'].window.set_cursor(None)
-            
         save_model.save_path = save_view['save_dialog'].get_current_folder()
     
+    def on_save_progress_window_delete_event(self, window, event):
+        """
+        Emulate clicking of the cancel button rather than closing the
+        window, which is hidden once the save has stopped.
+        """
+        self.on_save_cancel_button_clicked(None)
+        return True
+        
+    def on_save_cancel_button_clicked(self, button):
+        """
+        Cancel the current save.  The document is left as it is.
+        """
+        save_model = self.application.get_save_model()
+        save_view = self.application.get_save_view()
+        
+        if save_model.save_in_progress:
+            assert self.cancel_event
+            self.cancel_event.set()
+            
+            save_view['save_cancel_button'].set_sensitive(False)
+            save_view['save_progressbar'].set_text('Cancelling...')
+    
     # PROPERTY CALLBACKS
     
     def property_saved_keywords_value_change(self, model, old_value, new_value):
@@ -167,62 +187,105 @@ class SaveController(Controller):
         for keyword in new_value:
             keywords_liststore.append([keyword])
         
+    # THREAD CALLBACKS
+    
+    def on_save_progress(self, save_thread, page_number, page_count):
+        """Update the progress window and statusbar."""
+        save_view = self.application.get_save_view()
+        status_controller = self.application.get_status_controller()
+        
+        message = 'Saving page %i of %i' % (page_number, page_count)
+        
+        if not save_thread.cancel_event.isSet():
+            save_view['save_progressbar'].set_fraction(
+                float(page_number - 1) / page_count)
+            save_view['save_progressbar'].set_text(message)
+        
+        status_controller.pop(self.save_status_context)
+        status_controller.push(self.save_status_context, '%s...' % message)
+        
+    def on_save_succeeded(self, save_thread, filename):
+        """
+        Clear the document, now that it has been completely written.
+        """
+        self.application.get_document_model().clear()
+        
+        self._finish_save('Saved %s.' % os.path.basename(filename))
+        
+    def on_save_failed(self, save_thread, reason):
+        """
+        Leave the document as it is, for it was not saved.
+        """
+        self._finish_save('%s.' % reason)
+        
+    def on_save_aborted(self, save_thread, exc_info):
+        """
+        Change display to indicate that saving failed and reraise the
+        exception so that it can be caught by the sys.excepthook.
+        """
+        self.on_save_failed(save_thread, 'Save failed')
+        raise exc_info[0], exc_info[1], exc_info[2]
+        
     # PRIVATE METHODS
         
     def _save_pdf(self):
         """
-        Output the current document to a PDF file using ReportLab.
+        Output the current document to a PDF file using ReportLab.  The
+        file is written by a L{SavePdfThread}, so that the application
+        remains responsive and the save may be cancelled.
         """
         save_model = self.application.get_save_model()
         save_view = self.application.get_save_view()
         document_model = self.application.get_document_model()
+        status_controller = self.application.get_status_controller()
         
-        # TODO: seperate saving code into its own thread?
-        
-        # Setup output pdf
-        pdf = PdfCanvas(save_model.filename)
-        pdf.setTitle(save_model.title)
-        pdf.setAuthor(save_model.author)
-        pdf.setKeywords(save_model.keywords)
-            
-        # Generate pages
+        page_models = []
         page_iter = document_model.get_iter_first()
         while page_iter:
-            current_page = document_model.get_value(page_iter, 0)
-            
-            # Write transformed image
-            temp_file_path = ''.join([tempfile.mktemp(), '.bmp'])
-            current_page.pil_image.save(temp_file_path)
-        
-            assert os.path.exists(temp_file_path), \
-                'Temporary bitmap file was not created by PIL.'
-            
-            size = constants.PAGESIZES_INCHES[current_page.page_size]
-            pdf_width = size[0] * points_per_inch 
-            pdf_height = size[1] * points_per_inch
-            
-            # Swizzle width and height if the page has been rotated on its side
-            if abs(current_page.rotation) % 180 == 90:
-                pdf_width, pdf_height = pdf_height, pdf_width
-                
-            pdf.setPageSize((pdf_width, pdf_height))
-            pdf.drawImage(
-                temp_file_path, 
-                0, 0, width=pdf_width, height=pdf_height, 
-                preserveAspectRatio=True)
-            pdf.showPage()
-            
-            os.remove(temp_file_path)
-            
+            page_models.append(document_model.get_value(page_iter, 0))
             page_iter = document_model.iter_next(page_iter)
             
-        # Save complete PDF
-        pdf.save()
-            
-        assert os.path.exists(save_model.filename), \
-            'Final PDF file was not created by ReportLab.'
-            
-        document_model.clear()
+        save_thread = SavePdfThread(
+            page_models, save_model.filename, 
+            save_model.title, save_model.author, save_model.keywords)
+        save_thread.connect('progress', self.on_save_progress)
+        save_thread.connect('succeeded', self.on_save_succeeded)
+        save_thread.connect('failed', self.on_save_failed)
+        save_thread.connect('aborted', self.on_save_aborted)
+        
+        self.save_thread = save_thread
+        self.cancel_event = save_thread.cancel_event
+        
+        save_view['save_progress_primary_label'].set_markup(
+            '<big><b>Saving %s</b></big>' % 
+            os.path.basename(save_model.filename))
+        save_view['save_progressbar'].set_fraction(0)
+        save_view['save_progressbar'].set_text('Preparing document')
+        save_view['save_cancel_button'].set_sensitive(True)
+        save_view['save_progress_window'].show()
+        
+        status_controller.pop(self.save_status_context)
+        status_controller.push(self.save_status_context, 'Saving...')
+        
+        save_model.save_in_progress = True
+        save_thread.start()
+        
+    def _finish_save(self, message):
+        """
+        Hide the progress window and report how the save ended.
+        """
+        save_model = self.application.get_save_model()
+        save_view = self.application.get_save_view()
+        status_controller = self.application.get_status_controller()
+        
+        save_view['save_progress_window'].hide()
+        
+        status_controller.pop(self.save_status_context)
+        status_controller.push(self.save_status_context, message)
+        
+        self.save_thread = None
+        self.cancel_event = None
+        save_model.save_in_progress = False
         
     def _update_saved_keywords(self):
         """
@@ -246,6 +309,15 @@ class SaveController(Controller):
         
     # PUBLIC METHODS
     
+    def stop(self):
+        """
+        Cancel any save in progress and wait for its thread to finish,
+        so that the pages it is reading can be safely discarded.
+        """
+        if self.save_thread is not None and self.save_thread.isAlive():
+            self.cancel_event.set()
+            self.save_thread.join()
+    
     def run(self):
         """Run the save dialog."""
         save_model = self.application.get_save_model()
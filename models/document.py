@@ -23,6 +23,7 @@ document in the process of being scanned.
 import logging
 
 import gobject
+import gtk
 from gtkmvc.model import ListStoreModel
 
 class DocumentModel(ListStoreModel):
@@ -30,12 +31,22 @@ class DocumentModel(ListStoreModel):
     Represents a multi-page document in the process of being scanned.
     This is represented as a liststore of L{PageModel} objects so that it can
     be fed into a treeview to provide an outline of the document.
+    
+    Each page's row is indexed by a row reference, so that it can be found
+    without searching the liststore, see L{get_page_path}.
+    
+    Changes to the pages' thumbnails are not signalled as they happen, but
+    collected and signalled together once the main loop is idle, or after
+    a batch of changes, see L{begin_update}.
     """
     __properties__ = \
     {
         'count' : 0,
         'adjust_all_pages' : False,
         'manually_updating_row' : False,
+        
+        # The number of pages whose adjustments are being rendered
+        'rendering_count' : 0,
     }
     
     def __init__(self, application):
@@ -45,68 +56,186 @@ class DocumentModel(ListStoreModel):
         self.application = application
         ListStoreModel.__init__(self, gobject.TYPE_PYOBJECT)
         
+        # PageModel: gtk.TreeRowReference to its row
+        self._row_references = {}
+        
+        # Pages whose thumbnails have changed since rows were last refreshed
+        self._changed_pages = set()
+        self._refresh_source_id = None
+        self._update_depth = 0
+        
         self.log = logging.getLogger(self.__class__.__name__)
         
         self.log.debug('Created.')
     
     # PROPERTY CALLBACKS
         
+    def property_rendering_value_change(self, model, old_value, new_value):
+        """
+        Counts the pages whose adjustments are being rendered.
+        """
+        # Pages accept spurious changes, which are not counted
+        if new_value == old_value:
+            return
+        
+        if new_value:
+            self.rendering_count += 1
+        else:
+            self.rendering_count -= 1
+        
     def property_thumbnail_pixbuf_value_change(self, model, old_value, new_value):
         """
-        Searches through the liststore for the PageModel that has been
-        changed and issues its row's row_changed event so that its display
-        will be updated.
+        Queues the row of the PageModel that has been changed to be 
+        refreshed so that its display will be updated.
         """
-        search_iter = self.get_iter_first()
+        self._changed_pages.add(model)
         
-        while search_iter:
-            if self.get_value(search_iter, 0) == model:
-                self.row_changed(self.get_path(search_iter), search_iter)
-                return
-                
-            search_iter = self.iter_next(search_iter)
+        if self._update_depth == 0 and self._refresh_source_id is None:
+            self._refresh_source_id = gobject.idle_add(self._refresh_rows)
             
     # PUBLIC METHODS
             
     def append(self, page_model):
         """Adds a page to the end of the document."""
-        super(DocumentModel, self).append([page_model])
+        page_iter = super(DocumentModel, self).append([page_model])
+        self._index_page(page_model, page_iter)
         page_model.register_observer(self)
         self.count += 1
         
     def prepend(self, page_model):
         """Adds a page to the beginning of the document."""
-        super(DocumentModel, self).prepend([page_model])
+        page_iter = super(DocumentModel, self).prepend([page_model])
+        self._index_page(page_model, page_iter)
         page_model.register_observer(self)
         self.count += 1
         
     def insert(self, position, page_model):
         """Insert a page in the document at the specified position."""
-        super(DocumentModel, self).insert(position, [page_model])
+        page_iter = super(DocumentModel, self).insert(position, [page_model])
+        self._index_page(page_model, page_iter)
         page_model.register_observer(self)
         self.count += 1
     
     def insert_before(self, loc_iter, page_model):
         """Insert a page in the document before the iter."""
-        super(DocumentModel, self).insert_before(loc_iter, [page_model])
+        page_iter = super(DocumentModel, self).insert_before(loc_iter, [page_model])
+        self._index_page(page_model, page_iter)
         page_model.register_observer(self)
         self.count += 1
     
     def insert_after(self, loc_iter, page_model):
         """Insert a page in the document after the iter."""
-        super(DocumentModel, self).insert_after(loc_iter, [page_model])
+        page_iter = super(DocumentModel, self).insert_after(loc_iter, [page_model])
+        self._index_page(page_model, page_iter)
         page_model.register_observer(self)
         self.count += 1
         
     def remove(self, loc_iter):
         """Remove a page from the document."""
-        self.get_value(loc_iter, 0).unregister_observer(self)
+        page_model = self.get_value(loc_iter, 0)
+        page_model.unregister_observer(self)
+        if page_model.rendering:
+            self.rendering_count -= 1
+        self._row_references.pop(page_model, None)
+        self._changed_pages.discard(page_model)
         super(DocumentModel, self).remove(loc_iter)
+        page_model.discard()
         self.count -= 1
         
+    def begin_update(self):
+        """
+        Begins a batch of changes to the pages, such as rotating all of
+        them.  Their rows are not refreshed until the matching
+        L{end_update}.  Batches may be nested.
+        """
+        self._update_depth += 1
+        
+    def end_update(self):
+        """
+        Ends a batch of changes begun by L{begin_update}, refreshing the
+        rows of all the pages changed during it at once.
+        """
+        self._update_depth -= 1
+        
+        if self._update_depth == 0:
+            self._refresh_rows()
+        
     def clear(self):
         """Remove all pages from the document."""
-        for row in self:
-            row[0].unregister_observer(self)
+        page_models = [row[0] for row in self]
+        for page_model in page_models:
+            page_model.unregister_observer(self)
+        self._row_references = {}
+        self._changed_pages.clear()
+        self.rendering_count = 0
         super(DocumentModel, self).clear()
-        self.count = 0
\ No newline at end of file
+        for page_model in page_models:
+            page_model.discard()
+        self.count = 0
+        
+    def get_page_path(self, page_model):
+        """
+        Gets the path of a page's row, or None if the page is not in the
+        document.
+        
+        Rows moved by dragging them within the thumbnails are inserted
+        anew and their old rows deleted, which invalidates their
+        references.  These are found by searching the liststore, and
+        indexed again.
+        """
+        row_reference = self._row_references.get(page_model, None)
+        
+        if row_reference is not None and row_reference.valid():
+            path = row_reference.get_path()
+            
+            if self.get_value(self.get_iter(path), 0) is page_model:
+                return path
+        
+        search_iter = self.get_iter_first()
+        
+        while search_iter:
+            if self.get_value(search_iter, 0) is page_model:
+                self._index_page(page_model, search_iter)
+                return self.get_path(search_iter)
+                
+            search_iter = self.iter_next(search_iter)
+        
+        return None
+    
+    # PRIVATE METHODS
+    
+    def _refresh_rows(self):
+        """
+        Issues the row_changed event of each page whose thumbnail has
+        changed, unless a batch of changes is under way.
+        
+        Thumbnails are rendered asynchronously, so the manually_updating_row
+        flag is set here, immediately before each row_changed event it
+        applies to.
+        """
+        if self._refresh_source_id is not None:
+            gobject.source_remove(self._refresh_source_id)
+            self._refresh_source_id = None
+        
+        if self._update_depth > 0:
+            return False
+        
+        changed_pages = self._changed_pages
+        self._changed_pages = set()
+        
+        for page_model in changed_pages:
+            path = self.get_page_path(page_model)
+            
+            if path is not None:
+                self.manually_updating_row = True
+                self.row_changed(path, self.get_iter(path))
+        
+        return False
+    
+    def _index_page(self, page_model, page_iter):
+        """
+        Indexes the row of a page so that it can be found without
+        searching the liststore.
+        """
+        self._row_references[page_model] = \
+            gtk.TreeRowReference(self, self.get_path(page_iter))
@@ -43,6 +43,7 @@ class MainModel(Model):
         'show_statusbar' : True,
         'show_thumbnails' : True,
         'show_adjustments' : False,
+        'show_continuous' : False,
         'rotate_all_pages' : False,
         
         'active_scanner' : None,      # saneme.Device
@@ -95,6 +96,10 @@ class MainModel(Model):
             'show_adjustments', constants.DEFAULT_SHOW_ADJUSTMENTS, 
             properties.PropertyStateCallback(self, 'show_adjustments'))
         
+        self.show_continuous = state_manager.init_state(
+            'show_continuous', constants.DEFAULT_SHOW_CONTINUOUS, 
+            properties.PropertyStateCallback(self, 'show_continuous'))
+        
         self.rotate_all_pages = state_manager.init_state(
             'rotate_all_pages', constants.DEFAULT_ROTATE_ALL_PAGES, 
             properties.PropertyStateCallback(self, 'rotate_all_pages'))
@@ -131,6 +136,8 @@ class MainModel(Model):
         'show_thumbnails')
     set_prop_show_adjustments = properties.StatefulPropertySetter(
         'show_adjustments')
+    set_prop_show_continuous = properties.StatefulPropertySetter(
+        'show_continuous')
     set_prop_rotate_all_pages = properties.StatefulPropertySetter(
         'rotate_all_pages')
         
@@ -20,6 +20,8 @@ This module holds the PageModel, which represents a single scanned page.
 """
 
 import logging
+import math
+import threading
 
 import gtk
 from gtkmvc.model import Model
@@ -27,15 +29,38 @@ import Image, ImageEnhance
 
 from nostaples import constants
 from nostaples.utils.graphics import *
+from nostaples.utils.workers import BULK_PRIORITY
 
 class PageModel(Model):
     """
     Represents a single scanned page.
+    
+    The untransformed scan is kept in the application's page store rather
+    than on the model.  The adjusted display_image is only held while the
+    page is loaded for display (see L{load_display_image}).  It keeps the
+    scan's own mode, conversion to an RGB pixbuf being left to whatever
+    displays it at its displayed size.
+    
+    Changes to the adjustments are rendered on the application's
+    L{TransformWorkerPool}.  Each change increments adjustment_generation
+    so that renders of superseded values are dropped.
+    
+    Previews are scaled from the smallest of a pyramid of halved copies of
+    the display_image that is still at least as large as the preview,
+    rather than from the full-size image.  The pyramid is built along with
+    the display_image, by L{render_display_image}, off the main thread.
+    
+    Rotation is only an orientation flag.  The display_image is kept
+    unrotated, the rotation being applied at preview scale when displayed,
+    at thumbnail size for thumbnail_pixbuf, and once to L{pil_image} for
+    export.
+    
+    Only one thumbnail is kept, at the configured thumbnail size and
+    already rotated.  A thumbnail of another size is rendered when asked
+    for, the one that is kept being scaled to stand in for it meanwhile.
     """
     __properties__ = \
     {
-        '_raw_pil_image' : None,
-        
         'rotation' : 0,
         'brightness' : 1.0,
         'contrast' : 1.0,
@@ -43,9 +68,11 @@ class PageModel(Model):
         'resolution' : constants.DEFAULT_SCAN_RESOLUTION,
         'page_size' : constants.DEFAULT_PAGE_SIZE,
         
-        'pil_image' : None,
-        'pixbuf' : None,
+        'display_image' : None,
         'thumbnail_pixbuf': None,
+        
+        # Set while adjustments are being rendered on a worker thread
+        'rendering' : False,
     }
 
     # SETUP METHODS
@@ -70,10 +97,35 @@ class PageModel(Model):
         self.resolution = resolution
         self.page_size = page_size
         
+        self._page_store = None
+        self._raw_page_key = None
+        self._raw_size = (0, 0)
+        self._raw_mode = None
+        # Full depth samples of 16-bit scans
+        self._master_page_key = None
+        # The size of thumbnail_pixbuf, and the adjustment_generation and
+        # size of the thumbnail last requested
+        self._thumbnail_size = None
+        self._requested_thumbnail = None
+        # The adjustments the thumbnail and display_image were rendered with
+        self._rendered_settings = (1.0, 1.0, 1.0)
+        # Successively halved copies of the display_image they were
+        # reduced from, see L{_build_preview_levels}
+        self._preview_levels = []
+        self._preview_levels_source = None
+        self._preview_levels_lock = threading.Lock()
+        
+        self.adjustment_generation = 0
+        # The adjustment_generation the display_image was, or when not
+        # loaded will be, rendered for
+        self.display_generation = 0
+        
         if pil_image:
-            self._raw_pil_image = pil_image
-            self._update_pixbuf()
-            self._update_thumbnail_pixbuf()
+            self._page_store = application.get_page_store()
+            self._raw_page_key = self._page_store.store(pil_image)
+            self._raw_size = pil_image.size
+            self._raw_mode = pil_image.mode
+            self._store_master(pil_image)
         
         self.register_observer(self)
         
@@ -90,7 +142,10 @@ class PageModel(Model):
         Gets the width of the page after transformations have been
         applied.
         """
-        return self.pixbuf.get_width()
+        if abs(self.rotation % 360) in (90, 270):
+            return self._raw_size[1]
+        
+        return self._raw_size[0]
         
     @property
     def height(self):
@@ -98,29 +153,81 @@ class PageModel(Model):
         Gets the height of the page after transformations have been
         applied.
         """
-        return self.pixbuf.get_height()
+        if abs(self.rotation % 360) in (90, 270):
+            return self._raw_size[0]
+        
+        return self._raw_size[1]
+    
+    @property
+    def has_image(self):
+        """
+        Gets whether this page has any image data.  The null page does not.
+        """
+        return self._raw_page_key is not None
+    
+    @property
+    def display_image_bytes(self):
+        """
+        Gets the approximate memory taken by the display_image and its
+        preview levels when loaded, whether or not it is.
+        """
+        width, height = self._raw_size
+        
+        # PIL keeps lineart and grayscale at a byte per pixel, and color
+        # at four
+        if self._raw_mode in ('1', 'L'):
+            pixel_bytes = 1
+        else:
+            pixel_bytes = 4
+            
+        # The preview levels add up to a third of the display_image
+        return width * height * pixel_bytes * 4 / 3
+    
+    @property
+    def _raw_pil_image(self):
+        """
+        Gets the untransformed scan, mapped back in from the page store.
+        """
+        if self._raw_page_key is None:
+            return None
+        
+        return self._page_store.load(self._raw_page_key)
+    
+    @property
+    def pil_image(self):
+        """
+        Gets a full-size PIL image of the page with all transformations
+        applied.  This is computed on each access, so callers should hold
+        onto the result rather than reading it repeatedly.
+        """
+        image = self._raw_pil_image
+        
+        if image is None:
+            return None
+        
+        return self._rotate_image(
+            self._adjust_image(image, self._get_adjustment_settings()),
+            self.rotation)
     
     # PROPERTY CALLBACKS
         
     def property_rotation_value_change(self, model, old_value, new_value):
-        """Updates the full and thumbnail pixbufs."""
-        self._update_pixbuf()
-        self._update_thumbnail_pixbuf()
+        """Rotates the thumbnail pixbuf."""
+        if self.thumbnail_pixbuf is not None:
+            self.thumbnail_pixbuf = rotate_pixbuf(
+                self.thumbnail_pixbuf, new_value - old_value)
         
     def property_brightness_value_change(self, model, old_value, new_value):
         """Updates the full and thumbnail pixbufs."""
-        self._update_pixbuf()
-        self._update_thumbnail_pixbuf()
+        self._queue_update()
         
     def property_contrast_value_change(self, model, old_value, new_value):
         """Updates the full and thumbnail pixbufs."""
-        self._update_pixbuf()
-        self._update_thumbnail_pixbuf()
+        self._queue_update()
         
     def property_sharpness_value_change(self, model, old_value, new_value):
         """Updates the full and thumbnail pixbufs."""
-        self._update_pixbuf()
-        self._update_thumbnail_pixbuf()
+        self._queue_update()
     
     # PUBLIC METHODS
     
@@ -143,74 +250,488 @@ class PageModel(Model):
         the pixbuf and thumbnail from being update multiple
         times.
         """
-        if (self.__properties__['brightness'] == brightness and
-            self.__properties__['contrast'] == contrast and
-            self.__properties__['sharpness'] == sharpness):
+        if (self._prop_brightness == brightness and
+            self._prop_contrast == contrast and
+            self._prop_sharpness == sharpness):
             return
         
-        self.__properties__['brightness'] = brightness
-        self.__properties__['contrast'] = contrast
-        self.__properties__['sharpness'] = sharpness  
-        self._update_pixbuf()
-        self._update_thumbnail_pixbuf()      
+        self._prop_brightness = brightness
+        self._prop_contrast = contrast
+        self._prop_sharpness = sharpness  
+        self._queue_update()
+        
+    def get_thumbnail_pixbuf(self, thumbnail_size):
+        """
+        Gets the thumbnail_pixbuf at thumbnail_size if the thumbnail has
+        been rendered.  Otherwise it is queued to be rendered in the
+        background, once, and None is returned.  Thumbnails are only
+        rendered when asked for, so that only those which are shown are
+        ever rendered.
+        
+        A thumbnail of another size is queued to be rendered in the same
+        way.  Until it has been, the thumbnail_pixbuf is scaled to stand
+        in for it, but is not replaced, as this is called while the
+        thumbnail is being drawn.
+        """
+        if self._raw_page_key is None:
+            return None
+        
+        if self._thumbnail_size == thumbnail_size:
+            return self.thumbnail_pixbuf
+        
+        request = (self.adjustment_generation, thumbnail_size)
+        
+        if self._requested_thumbnail != request:
+            self._requested_thumbnail = request
+            
+            # Submitted with the current generation, so as not to 
+            # supersede any render of the current adjustments
+            self.application.get_transform_pool().submit(
+                self, self.adjustment_generation, 
+                self._on_render_finished, self._render, 
+                self._get_adjustment_settings(), False, thumbnail_size,
+                priority=BULK_PRIORITY, errback=self._on_render_failed)
+        
+        if self.thumbnail_pixbuf is None:
+            return None
+        
+        width = self.thumbnail_pixbuf.get_width()
+        height = self.thumbnail_pixbuf.get_height()
+        zoom = float(thumbnail_size) / max(width, height)
+        
+        return self.thumbnail_pixbuf.scale_simple(
+            max(int(width * zoom), 1), max(int(height * zoom), 1), 
+            gtk.gdk.INTERP_BILINEAR)
+    
+    def cancel_adjustments(self):
+        """
+        Abandons rendering the current adjustments, if they are being
+        rendered, restoring those that were last rendered.
+        """
+        if not self.rendering:
+            return
+        
+        self.application.get_transform_pool().cancel(self)
+        
+        brightness, contrast, sharpness = self._rendered_settings
+        self._prop_brightness = brightness
+        self._prop_contrast = contrast
+        self._prop_sharpness = sharpness
+        
+        # Nothing rendered for the abandoned adjustments may be reused
+        self.adjustment_generation += 1
+        if self.display_image is None:
+            self.display_generation = self.adjustment_generation
+        
+        self.rendering = False
+        
+    def load_display_image(self, display_image=None):
+        """
+        Renders the full-size, unrotated display_image so that the page
+        can be displayed.  Does nothing if it is already loaded or there
+        is no image data.
+        
+        Without adjustments this is the image from the page store itself,
+        so no copy of the scan is made.
+        
+        @param display_image: The display_image, if it has already been
+                                rendered for the current adjustments by
+                                L{render_display_image}.
+        """
+        if self.display_image is None and self._raw_page_key is not None:
+            if display_image is None:
+                display_image = self.render_display_image(
+                    self._get_adjustment_settings())
+                
+            self.display_generation = self.adjustment_generation
+            self.display_image = display_image
+        
+    def unload_display_image(self):
+        """
+        Releases the display_image once the page is no longer being
+        displayed.
+        """
+        self.display_image = None
+        
+        self._preview_levels_lock.acquire()
+        try:
+            self._preview_levels = []
+            self._preview_levels_source = None
+        finally:
+            self._preview_levels_lock.release()
+        
+    def get_master(self):
+        """
+        Gets the unadjusted, unrotated full depth samples of a page
+        scanned at 16 bits per sample, for archival export.
+        
+        @return: A (mode, size, samples) tuple where samples is a
+                    string of big-endian 16-bit samples, or None if
+                    the page was scanned at 8 bits or less.
+        """
+        if self._master_page_key is None:
+            return None
+        
+        mode = self._page_store.get_mode(self._master_page_key)
+        master_image = self._page_store.load(self._master_page_key)
+        
+        # Color may be loaded padded to four bytes per pixel
+        return (mode, self._raw_size, master_image.tostring('raw', mode))
+        
+    def render_display_image(self, settings):
+        """
+        Renders the display_image for the given adjustments without
+        loading it, and builds its preview pyramid.  May be run on a
+        worker thread.
+        
+        @param settings: A (brightness, contrast, sharpness) tuple.
+        """
+        display_image = self._adjust_image(self._raw_pil_image, settings)
+        
+        self._build_preview_levels(display_image)
+        
+        return display_image
+        
+    def render_proxy(self, settings, rotation, region, size, resample):
+        """
+        Renders a region of the page at reduced resolution, for previewing
+        adjustments without transforming the full-size image.  Only the
+        region is read from the page store.  May be run on a worker thread.
+        
+        @param settings: A tuple as returned by L{_get_adjustment_settings}.
+        @type rotation: int
+        @param rotation: The rotation the region is given in.
+        @type region: tuple
+        @param region: The (left, upper, right, lower) box to render, in
+                        transformed page coordinates.
+        @type size: tuple
+        @param size: The (width, height) to render the region at.
+        @param resample: The PIL filter to scale the region with.
+        @return: A pixbuf of the rendered region, or None if the page has
+                    been discarded.
+        """
+        raw_image = self._raw_pil_image
+        
+        if raw_image is None:
+            return None
+        
+        box, size = self._get_raw_region(region, size, rotation)
+        
+        image = scale_pil_image(raw_image.crop(box), size, resample)
+        
+        return rotate_pixbuf(convert_pil_image_to_pixbuf(
+            self._adjust_image(image, settings)), rotation)
+    
+    def render_region(self, region, size, resample, display_image=None):
+        """
+        Renders a region of the loaded display_image, for drawing the
+        preview.  The region is scaled from the nearest preview level
+        at least as large as the requested size, and only the region is
+        expanded to RGB.  May be run on a worker thread.
+        
+        @type region: tuple
+        @param region: The (left, upper, right, lower) box to render, in
+                        transformed page coordinates.
+        @type size: tuple
+        @param size: The (width, height) to render the region at.
+        @param resample: The PIL filter to scale the region with.
+        @param display_image: A display_image rendered by
+                                L{render_display_image} to use instead of
+                                the loaded one.
+        @return: A pixbuf of the rendered region, or None if the
+                    display_image is not loaded.
+        """
+        if display_image is None:
+            display_image = self.display_image
+            
+        rotation = self.rotation
+        
+        if display_image is None:
+            return None
+        
+        box, size = self._get_raw_region(region, size, rotation)
+        
+        left, upper, right, lower = box
+        level = self._get_preview_level(display_image,
+            float(size[0]) / (right - left), float(size[1]) / (lower - upper))
+        
+        x_scale = float(level.size[0]) / self._raw_size[0]
+        y_scale = float(level.size[1]) / self._raw_size[1]
+        left = int(math.floor(left * x_scale))
+        upper = int(math.floor(upper * y_scale))
+        box = (left, upper, 
+            max(int(math.ceil(right * x_scale)), left + 1),
+            max(int(math.ceil(lower * y_scale)), upper + 1))
+        
+        image = scale_pil_image(level.crop(box), size, resample)
+        
+        return rotate_pixbuf(convert_pil_image_to_pixbuf(image), rotation)
+        
+    def discard(self):
+        """
+        Removes this page's image data from the page store.  Called when
+        the page is removed from its document.
+        """
+        if self._raw_page_key is None:
+            return
+        
+        self.application.get_transform_pool().cancel(self)
+        self.unload_display_image()
+        self._page_store.discard(self._raw_page_key)
+        self._raw_page_key = None
+        
+        if self._master_page_key is not None:
+            self._page_store.discard(self._master_page_key)
+            self._master_page_key = None
     
     # PRIVATE METHODS
     
-    def _update_pixbuf(self):
-        """
-        Creates a full-size pixbuf of the scanned image with all 
-        transformations applied.
-        """   
-        image = self._raw_pil_image  
-        
-        if self.brightness != 1.0:
-            image = ImageEnhance.Brightness(image).enhance(
-                self.brightness)
-        if self.contrast != 1.0:
-            image = ImageEnhance.Contrast(image).enhance(
-                self.contrast)
-        if self.sharpness != 1.0:
-            image = ImageEnhance.Sharpness(image).enhance(
-                self.sharpness)
+    def _get_raw_region(self, region, size, rotation):
+        """
+        Maps a region of the page in transformed coordinates, and the size
+        it is to be rendered at, back onto the unrotated scan.
+        
+        @return: A (box, size) tuple.
+        """
+        raw_width, raw_height = self._raw_size
+        left, upper, right, lower = region
+        width, height = size
+        
+        rotation = rotation % 360
+        if rotation == 90:
+            box = (raw_width - lower, left, raw_width - upper, right)
+            width, height = height, width
+        elif rotation == 180:
+            box = (raw_width - right, raw_height - lower, 
+                raw_width - left, raw_height - upper)
+        elif rotation == 270:
+            box = (upper, raw_height - right, lower, raw_height - left)
+            width, height = height, width
+        else:
+            box = region
             
-        if abs(self.rotation % 360) == 90:
-            image = image.transpose(Image.ROTATE_90)
-        elif abs(self.rotation % 360) == 180:
-            image = image.transpose(Image.ROTATE_180)
-        elif abs(self.rotation % 360) == 270:
-            image = image.transpose(Image.ROTATE_270)
+        return (box, (width, height))
+    
+    def _store_master(self, pil_image):
+        """
+        Moves the full depth samples of a 16-bit scan, if any, into the
+        page store.
+        
+        Each 16-bit sample is stored as a pair of 8-bit samples of an
+        image twice as wide as the page, so that the page store can hold
+        it like any other image.
+        """
+        samples = pil_image.info.pop('samples16', None)
         
-        self.pil_image = image
-        self.pixbuf = convert_pil_image_to_pixbuf(image)
+        if samples is None:
+            return
+        
+        width, height = pil_image.size
         
-    def _update_thumbnail_pixbuf(self):
+        self._master_page_key = self._page_store.store(
+            Image.fromstring(pil_image.mode, (width * 2, height), samples))
+    
+    def _build_preview_levels(self, display_image):
         """
-        Creates a thumbnail image with all transformations applied.
+        Reduces a display_image to its preview pyramid, each level half
+        the size of the one before, down to a single pixel.  Level 0 is
+        the display_image itself.  The pyramid is only kept for the most
+        recently built display_image.
+        
+        This is slow, so it is done on a worker thread when the
+        display_image is rendered, and the lock is not held meanwhile.
         """
-        preferences_model = self.application.get_preferences_model()
+        preview_levels = [display_image]
+        width, height = display_image.size
+        
+        while width // 2 >= 1 and height // 2 >= 1:
+            width, height = width // 2, height // 2
+            preview_levels.append(scale_pil_image(
+                preview_levels[-1], (width, height), 
+                constants.PREVIEW_LEVEL_SCALING_MODE))
             
-        image = self._raw_pil_image
+        self._preview_levels_lock.acquire()
+        try:
+            self._preview_levels = preview_levels
+            self._preview_levels_source = display_image
+        finally:
+            self._preview_levels_lock.release()
+            
+        return preview_levels
+    
+    def _get_preview_level(self, display_image, x_scale, y_scale):
+        """
+        Gets the smallest level of a display_image's preview pyramid
+        that is no smaller than the display_image scaled by x_scale and
+        y_scale.
+        
+        Should the pyramid have been replaced by that of another
+        display_image since it was built, it is built again.
+        """
+        self._preview_levels_lock.acquire()
+        try:
+            preview_levels = self._preview_levels
+            source = self._preview_levels_source
+        finally:
+            self._preview_levels_lock.release()
+        
+        if source is not display_image:
+            preview_levels = self._build_preview_levels(display_image)
+            
+        level = 0
+        width, height = display_image.size
+        
+        while (level + 1 < len(preview_levels) and
+               width // 2 >= max(width * x_scale, 1) and 
+               height // 2 >= max(height * y_scale, 1)):
+            x_scale *= 2
+            y_scale *= 2
+            width, height = width // 2, height // 2
+            level += 1
+            
+        return preview_levels[level]
+    
+    def _get_adjustment_settings(self):
+        """
+        Gets a snapshot of the current adjustments, so that they can be
+        handed to a worker thread.
+        """
+        return (self.brightness, self.contrast, self.sharpness)
+    
+    def _adjust_image(self, image, settings):
+        """
+        Applies adjustments to a PIL image.
+        
+        PIL cannot enhance lineart, so lineart is adjusted in grayscale
+        and thresholded back to one bit per pixel.
+        
+        @param settings: A tuple as returned by L{_get_adjustment_settings}.
+        """
+        brightness, contrast, sharpness = settings
+        
+        if settings == (1.0, 1.0, 1.0):
+            return image
+        
+        lineart = image.mode == '1'
+        if lineart:
+            image = image.convert('L')
+        
+        if brightness != 1.0:
+            image = ImageEnhance.Brightness(image).enhance(brightness)
+        if contrast != 1.0:
+            image = ImageEnhance.Contrast(image).enhance(contrast)
+        if sharpness != 1.0:
+            image = ImageEnhance.Sharpness(image).enhance(sharpness)
+        
+        if lineart:
+            image = image.point(
+                [0] * constants.LINEART_THRESHOLD + 
+                [255] * (256 - constants.LINEART_THRESHOLD), '1')
             
-        if self.brightness != 1.0:
-            image = ImageEnhance.Brightness(image).enhance(
-                self.brightness)
-        if self.contrast != 1.0:
-            image = ImageEnhance.Contrast(image).enhance(
-                self.contrast)
-        if self.sharpness != 1.0:
-            image = ImageEnhance.Sharpness(image).enhance(
-                self.sharpness)
-        
-        if abs(self.rotation % 360) == 90:
+        return image
+    
+    def _rotate_image(self, image, rotation):
+        """
+        Applies a rotation to a PIL image.
+        """
+        if abs(rotation % 360) == 90:
             image = image.transpose(Image.ROTATE_90)
-        elif abs(self.rotation % 360) == 180:
+        elif abs(rotation % 360) == 180:
             image = image.transpose(Image.ROTATE_180)
-        elif abs(self.rotation % 360) == 270:
+        elif abs(rotation % 360) == 270:
             image = image.transpose(Image.ROTATE_270)
             
-        width, height = image.size
+        return image
+    
+    def _queue_update(self):
+        """
+        Queues the full and thumbnail pixbufs to be rendered with the
+        current adjustments on a worker thread.  Any render still pending
+        for earlier adjustments is superseded.
+        """
+        if self._raw_page_key is None:
+            return
         
-        thumbnail_size = preferences_model.thumbnail_size
+        transform_pool = self.application.get_transform_pool()
+        
+        self.adjustment_generation += 1
+        
+        # An unloaded display_image will be rendered afresh when loaded
+        if self.display_image is None:
+            self.display_generation = self.adjustment_generation
+        
+        transform_pool.submit(
+            self, self.adjustment_generation, self._on_render_finished,
+            self._render, self._get_adjustment_settings(), 
+            self.display_image is not None, 
+            self.application.get_preferences_model().thumbnail_size,
+            priority=BULK_PRIORITY, errback=self._on_render_failed)
+        
+        self.rendering = True
+        
+    def _render(self, settings, render_display_image, thumbnail_size):
+        """
+        Renders the display image (if requested) and the unrotated
+        thumbnail at thumbnail_size.  Runs on a worker thread, so it must
+        not touch any model properties.
+        
+        The thumbnail is scaled from the display image if that is
+        rendered.  Otherwise the scan is scaled to thumbnail size before
+        it is adjusted, rather than adjusting every pixel of the scan.
+        
+        @return: A (display_image, thumbnail_size, thumbnail) tuple, the
+                    display_image being None if it was not requested.
+        """
+        # The preview pyramid is only built if the display image is wanted
+        if render_display_image:
+            display_image = self.render_display_image(settings)
+            thumbnail = self._scale_thumbnail(display_image, thumbnail_size)
+        else:
+            # Otherwise only the thumbnail's pixels need be adjusted
+            display_image = None
+            thumbnail = self._adjust_image(
+                self._scale_thumbnail(self._raw_pil_image, thumbnail_size),
+                settings)
+            
+        return (display_image, thumbnail_size, 
+            convert_pil_image_to_pixbuf(thumbnail))
+    
+    def _on_render_finished(self, result):
+        """
+        Applies the images rendered by L{_render}.  The display image
+        is discarded if the page was unloaded in the meantime.
+        """
+        display_image, thumbnail_size, thumbnail = result
+        
+        # The render is current, so the adjustments are those rendered
+        self._rendered_settings = self._get_adjustment_settings()
+        
+        if display_image is not None and self.display_image is not None:
+            self.display_generation = self.adjustment_generation
+            self.display_image = display_image
+            
+        # If the thumbnail size has changed since this was queued, then
+        # the thumbnail may be asked for, and rendered, again
+        if thumbnail_size != \
+            self.application.get_preferences_model().thumbnail_size:
+            self._requested_thumbnail = None
+        
+        self._thumbnail_size = thumbnail_size
+        self.thumbnail_pixbuf = rotate_pixbuf(thumbnail, self.rotation)
+        self.rendering = False
+        
+    def _on_render_failed(self, exc_info):
+        """
+        Stops counting the page as rendering if L{_render} raised.  The
+        error itself is reported by the transform pool.
+        """
+        self.rendering = False
+        
+    def _scale_thumbnail(self, image, thumbnail_size):
+        """
+        Scales a transformed image down to fit within thumbnail_size.
+        """
+        width, height = image.size
         
         width_ratio = float(width) / thumbnail_size
         height_ratio = float(height) / thumbnail_size
@@ -223,8 +744,6 @@ class PageModel(Model):
         target_width = int(width * zoom)
         target_height = int(height * zoom)
         
-        image = image.resize(
-            (target_width, target_height), 
-            constants.THUMBNAILS_SCALING_MODE)
-        
-        self.thumbnail_pixbuf = convert_pil_image_to_pixbuf(image)
\ No newline at end of file
+        return scale_pil_image(
+            image, (target_width, target_height), 
+            constants.THUMBNAILS_SCALING_MODE)
\ No newline at end of file
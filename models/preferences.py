@@ -35,6 +35,7 @@ class PreferencesModel(Model):
         'preview_mode' : constants.DEFAULT_PREVIEW_MODE,
         'thumbnail_size' : constants.DEFAULT_THUMBNAIL_SIZE,
         'toolbar_style' : constants.DEFAULT_TOOLBAR_STYLE,
+        'page_storage' : constants.DEFAULT_PAGE_STORAGE,
         
         'blacklisted_scanners' : [],    # List of scanner display names
         
@@ -73,6 +74,11 @@ class PreferencesModel(Model):
             properties.GuardedPropertyStateCallback(
                 self, 'toolbar_style', constants.TOOLBAR_STYLES_LIST))
         
+        self.page_storage = state_manager.init_state(
+            'page_storage', constants.DEFAULT_PAGE_STORAGE, 
+            properties.GuardedPropertyStateCallback(
+                self, 'page_storage', constants.PAGE_STORAGE_LIST))
+        
         self.blacklisted_scanners = state_manager.init_state(
             'blacklisted_scanners', constants.DEFAULT_BLACKLISTED_SCANNERS, 
             properties.PropertyStateCallback(self, 'blacklisted_scanners'))
@@ -89,6 +95,8 @@ class PreferencesModel(Model):
         'thumbnail_size')
     set_prop_toolbar_style = properties.StatefulPropertySetter(
         'toolbar_style')
+    set_prop_page_storage = properties.StatefulPropertySetter(
+        'page_storage')
     set_prop_blacklisted_scanners = properties.StatefulPropertySetter(
         'blacklisted_scanners')
     set_prop_saved_keywords = properties.StatefulPropertySetter(
@@ -41,6 +41,9 @@ class SaveModel(Model):
         'show_document_metadata' : True,
         
         'filename' : '',
+        
+        # Set while a document is being written by a SavePdfThread
+        'save_in_progress' : False,
     }
 
     def __init__(self, application):
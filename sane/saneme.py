@@ -26,6 +26,7 @@ necessary to the end user have been redeclared.
 from array import *
 import atexit
 import ctypes
+import sys
 from types import *
 
 from PIL import Image
@@ -359,7 +360,9 @@ class Device(object):
             the device.  Has the format:
             cancel = progress_callback(sane_info, bytes_read)
         @return: A PIL image containing the scanned
-            page.
+            page.  Scans with a depth of 16 bits are returned
+            as an 8-bit working copy, with the full depth samples
+            kept in its info dictionary.  See L{_read_16_bit_samples}.
         """
         if not self._handle:
             raise AssertionError('device handle was None.')
@@ -498,20 +501,64 @@ class Device(object):
                 pil_image = Image.frombuffer(
                     'L', (scan_info.width, scan_info.height), 
                     data_array, 'raw', 'L', 0, 1)
+            # High depth grayscale
+            elif sane_parameters.depth == 16:
+                pil_image = self._read_16_bit_samples(
+                    'L', (scan_info.width, scan_info.height), data_array)
             else:
                 raise AssertionError(
                     'Unexpected bit depth for monochrome scan format: %i' % sane_parameters.depth)
         elif sane_parameters.format == SANE_FRAME_RGB.value:
             # Color
-            pil_image = Image.frombuffer(
-                'RGB', (scan_info.width, scan_info.height), 
-                data_array, 'raw', 'RGB', 0, 1)
+            if sane_parameters.depth == 8:
+                pil_image = Image.frombuffer(
+                    'RGB', (scan_info.width, scan_info.height), 
+                    data_array, 'raw', 'RGB', 0, 1)
+            # High depth color
+            elif sane_parameters.depth == 16:
+                pil_image = self._read_16_bit_samples(
+                    'RGB', (scan_info.width, scan_info.height), data_array)
+            else:
+                raise AssertionError(
+                    'Unexpected bit depth for color scan format: %i' % sane_parameters.depth)
         else:
             # TICKET #45
             raise NotImplementedError(
                'Individual color frame scanned, but not yet supported.')
             
         return pil_image
+    
+    def _read_16_bit_samples(self, mode, size, data_array):
+        """
+        Build an 8-bit working copy of a 16-bit scan.
+        
+        SANE delivers 16-bit samples in native byte order (See SANE API
+        4.3.8).  On little-endian machines they are swapped to big-endian
+        in a single pass over the array.  PIL then decodes the working
+        copy by taking the high byte of each sample, so no per-pixel
+        Python code is run.
+        
+        PIL has no 16-bit color mode, so the full depth master is kept
+        as the array of big-endian samples (as PDF expects them) in the
+        image's info dictionary under 'samples16'.  The samples are
+        copied out of data_array once, swapped in place, and that same
+        buffer is both decoded by PIL and kept as the master.
+        
+        @param mode: 'L' or 'RGB'.
+        @param size: The (width, height) of the scan.
+        @param data_array: The scanned data, as an array of bytes.
+        """
+        samples = array('H')
+        samples.fromstring(data_array)
+        
+        if sys.byteorder == 'little':
+            samples.byteswap()
+        
+        pil_image = Image.fromstring(
+            mode, size, samples, 'raw', '%s;16B' % mode)
+        pil_image.info['samples16'] = samples
+        
+        return pil_image
         
     # Methods for use only by Options
     
@@ -0,0 +1,80 @@
+import unittest
+
+from mock import Mock
+
+from nostaples import constants
+from nostaples.application import Application
+from nostaples.controllers.continuous import ContinuousController
+from nostaples.models.page import PageModel
+from nostaples.utils.cache import LRUCache
+from nostaples.utils.workers import TransformWorkerPool
+
+class TestContinuousController(unittest.TestCase):
+    def setUp(self):
+        self.mock_application = Mock(spec=Application)
+        self.mock_transform_pool = Mock(spec=TransformWorkerPool)
+        self.mock_application.get_transform_pool.return_value = \
+            self.mock_transform_pool
+        self.mock_layout = Mock()
+        self.mock_application.get_continuous_view.return_value = \
+            {'continuous_view_layout': self.mock_layout}
+        
+        # Only the layout and render state are needed, so the view is
+        # not built
+        self.continuous_controller = \
+            ContinuousController.__new__(ContinuousController)
+        self.continuous_controller.application = self.mock_application
+        self.continuous_controller.page_cache = LRUCache(10)
+        self.continuous_controller.pending_renders = {}
+        
+        self.page_models = []
+        for i in range(2):
+            page_model = Mock(spec=PageModel)
+            page_model.adjustment_generation = 0
+            page_model.rotation = 0
+            self.page_models.append(page_model)
+        
+        self._lay_out(self.page_models)
+
+    def tearDown(self):
+        self.mock_application = None
+        self.mock_transform_pool = None
+        self.mock_layout = None
+        self.continuous_controller = None
+        self.page_models = None
+
+    def _lay_out(self, page_models):
+        self.continuous_controller.page_models = page_models
+        self.continuous_controller.page_tops = [10, 120][:len(page_models)]
+        self.continuous_controller.page_sizes = \
+            [(80, 100)] * len(page_models)
+        self.continuous_controller.page_indices = dict(
+            [(page_model, i) for i, page_model in enumerate(page_models)])
+
+    def test_rendered_page_is_drawn_where_it_now_is(self):
+        page_model = self.page_models[1]
+        key = self.continuous_controller._get_page_key(1)
+        self.continuous_controller.pending_renders[page_model] = key
+        
+        # The first page is deleted while the second is being rendered
+        self._lay_out([page_model])
+        
+        self.continuous_controller._on_page_rendered((key, 'pixbuf'))
+        
+        self.assertEqual(
+            self.continuous_controller.page_cache.get(key), 'pixbuf')
+        self.assertEqual(self.continuous_controller.pending_renders, {})
+        self.mock_layout.bin_window.invalidate_rect.assert_called_with(
+            (constants.CONTINUOUS_PAGE_SPACING, 10, 80, 100), False)
+
+    def test_rendered_page_that_was_deleted_is_dropped(self):
+        page_model = self.page_models[1]
+        key = self.continuous_controller._get_page_key(1)
+        self.continuous_controller.pending_renders[page_model] = key
+        
+        self._lay_out(self.page_models[:1])
+        
+        self.continuous_controller._on_page_rendered((key, None))
+        
+        self.assertEqual(self.continuous_controller.page_cache.get(key), None)
+        self.assertFalse(self.mock_layout.bin_window.invalidate_rect.called)
@@ -0,0 +1,111 @@
+import unittest
+
+from mock import Mock
+import Image
+
+from nostaples import constants
+from nostaples.application import Application
+from nostaples.controllers.page import PageController
+from nostaples.models.page import PageModel
+from nostaples.models.preferences import PreferencesModel
+from nostaples.utils.cache import LRUCache
+from nostaples.utils.workers import TransformWorkerPool
+
+class TestPageController(unittest.TestCase):
+    def setUp(self):
+        self.mock_application = Mock(spec=Application)
+        self.mock_transform_pool = Mock(spec=TransformWorkerPool)
+        self.mock_application.get_transform_pool.return_value = \
+            self.mock_transform_pool
+        self.mock_preferences_model = Mock(spec=PreferencesModel)
+        self.mock_preferences_model.preview_mode = 'Antialias (Smoothest)'
+        self.mock_application.get_preferences_model.return_value = \
+            self.mock_preferences_model
+        self.mock_layout = Mock()
+        self.mock_application.get_page_view.return_value = \
+            {'page_view_image_layout': self.mock_layout}
+        
+        # Only the tile and prefetching state is needed, so the view is
+        # not built
+        self.page_controller = PageController.__new__(PageController)
+        self.page_controller.application = self.mock_application
+        self.page_controller.tile_cache = LRUCache(10)
+        self.page_controller.unrefined_tiles = {}
+        self.page_controller.refining_tiles = set()
+        self.page_controller.refine_source_id = None
+        self.page_controller.wheel_timeout_id = None
+        self.page_controller.prefetch_token = object()
+        self.page_controller.prefetch_generation = 3
+        self.page_controller.prefetched_pages = []
+        
+        self.page_model = Mock(spec=PageModel)
+        self.page_model.width = 1000
+        self.page_model.height = 1000
+        self.page_model.rotation = 0
+        self.page_model.display_generation = 0
+        self.page_controller.model = self.page_model
+        self.page_controller.preview_zoom = 0.5
+        self.page_controller.preview_size = (500, 500)
+        self.page_controller.preview_offset = (0, 0)
+    
+    def tearDown(self):
+        self.mock_application = None
+        self.mock_transform_pool = None
+        self.mock_preferences_model = None
+        self.mock_layout = None
+        self.page_controller = None
+        self.page_model = None
+    
+    def test_uncached_tile_is_queued(self):
+        # Stands in for the idle callback that would submit the tile
+        self.page_controller.refine_source_id = 1
+        
+        self.assertEqual(self.page_controller._get_tile(1, 0), None)
+        
+        key = self.page_controller._get_tile_key(
+            self.page_model, 0.5, Image.ANTIALIAS, 1, 0)
+        self.assertEqual(self.page_controller.unrefined_tiles.keys(), [key])
+        self.assertFalse(self.page_model.render_region.called)
+        
+        # Tiles being rendered are not queued again
+        self.page_controller.unrefined_tiles = {}
+        self.page_controller.refining_tiles.add(key)
+        self.page_controller._get_tile(1, 0)
+        
+        self.assertEqual(self.page_controller.unrefined_tiles, {})
+    
+    def test_refined_tile_is_cached_and_drawn(self):
+        key = self.page_controller._get_tile_key(
+            self.page_model, 0.5, Image.ANTIALIAS, 1, 0)
+        self.page_controller.refining_tiles.add(key)
+        
+        self.page_controller._on_tile_refined((key, 'tile'))
+        
+        self.assertEqual(self.page_controller.tile_cache.get(key), 'tile')
+        self.assertEqual(self.page_controller.refining_tiles, set())
+        self.mock_transform_pool.cancel.assert_called_with(
+            (self.page_controller.tile_cache, key))
+        self.mock_layout.bin_window.draw_pixbuf.assert_called_with(
+            None, 'tile', 0, 0, constants.PREVIEW_TILE_SIZE, 0)
+    
+    def test_prefetched_tiles_are_cached(self):
+        page_model = Mock(spec=PageModel)
+        page_model.adjustment_generation = 7
+        page_model.render_display_image.return_value = 'display image'
+        tile = Mock()
+        page_model.render_region.return_value.subpixbuf.return_value = tile
+        self.page_controller.prefetched_pages = [page_model]
+        
+        # Only the prefetch's own generation is current
+        self.mock_transform_pool.is_stale.side_effect = \
+            lambda owner, generation: generation != 3
+        
+        jobs = [(page_model, 7, (1.0, 1.0, 1.0), None, 
+            [('key', ((0, 0, 10, 10), (10, 10), (0, 0, 10, 10)))])]
+        
+        results = self.page_controller._render_prefetched_pages(
+            jobs, None, 3)
+        self.page_controller._on_pages_prefetched(results)
+        
+        page_model.load_display_image.assert_called_with('display image')
+        self.assertEqual(self.page_controller.tile_cache.get('key'), tile)
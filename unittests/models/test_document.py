@@ -123,4 +123,53 @@ class TestDocumentModel(unittest.TestCase):
         self.document_model.clear()
         
         self.assertEqual(self.document_model.count, 0)
-        self.assertRaises(ValueError, self.document_model.get_iter, 0)
\ No newline at end of file
+        self.assertRaises(ValueError, self.document_model.get_iter, 0)
+        
+    def test_get_page_path(self):
+        p0 = PageModel(self.mock_application)
+        p1 = PageModel(self.mock_application)
+        p2 = PageModel(self.mock_application)
+        p3 = PageModel(self.mock_application)
+        
+        self.document_model.append(p1)
+        self.document_model.prepend(p0)
+        self.document_model.append(p2)
+        
+        self.assertEqual(self.document_model.get_page_path(p0), (0,))
+        self.assertEqual(self.document_model.get_page_path(p1), (1,))
+        self.assertEqual(self.document_model.get_page_path(p2), (2,))
+        self.assertEqual(self.document_model.get_page_path(p3), None)
+        
+        iter = self.document_model.get_iter(0)
+        self.document_model.remove(iter)
+        
+        self.assertEqual(self.document_model.get_page_path(p0), None)
+        self.assertEqual(self.document_model.get_page_path(p1), (0,))
+        self.assertEqual(self.document_model.get_page_path(p2), (1,))
+        
+        self.document_model.clear()
+        
+        self.assertEqual(self.document_model.get_page_path(p1), None)
+        
+    def test_batch_update(self):
+        p0 = PageModel(self.mock_application)
+        p1 = PageModel(self.mock_application)
+        
+        self.document_model.append(p0)
+        self.document_model.append(p1)
+        
+        changed_paths = []
+        self.document_model.connect(
+            'row-changed', 
+            lambda model, path, iter: changed_paths.append(path))
+        
+        self.document_model.begin_update()
+        p1.thumbnail_pixbuf = object()
+        p0.thumbnail_pixbuf = object()
+        p1.thumbnail_pixbuf = object()
+        
+        self.assertEqual(changed_paths, [])
+        
+        self.document_model.end_update()
+        
+        self.assertEqual(sorted(changed_paths), [(0,), (1,)])
@@ -0,0 +1,50 @@
+import unittest
+
+from mock import Mock
+
+from nostaples.application import Application
+from nostaples.models.page import PageModel
+
+class TestPageModel(unittest.TestCase):
+    def setUp(self):
+        self.mock_application = Mock(spec=Application)
+    
+    def tearDown(self):
+        self.mock_application = None
+    
+    def test_set_adjustments(self):
+        p0 = PageModel(self.mock_application)
+        p1 = PageModel(self.mock_application)
+        
+        p0.set_adjustments(1.5, 0.5, 2.0)
+        
+        self.assertEqual(p0.brightness, 1.5)
+        self.assertEqual(p0.contrast, 0.5)
+        self.assertEqual(p0.sharpness, 2.0)
+        self.assertEqual(p1.brightness, 1.0)
+        self.assertEqual(p1.contrast, 1.0)
+        self.assertEqual(p1.sharpness, 1.0)
+        
+        p1.set_adjustments(0.5, 1.0, 1.0)
+        
+        self.assertEqual(p0.brightness, 1.5)
+        self.assertEqual(p1.brightness, 0.5)
+        self.assertEqual(p1.contrast, 1.0)
+        
+        self.assertEqual(PageModel(self.mock_application).brightness, 1.0)
+        
+    def test_cancel_adjustments(self):
+        p0 = PageModel(self.mock_application)
+        p1 = PageModel(self.mock_application)
+        
+        p0.set_adjustments(1.5, 0.5, 2.0)
+        p1.set_adjustments(0.5, 1.0, 1.0)
+        p0.rendering = True
+        
+        p0.cancel_adjustments()
+        
+        self.assertEqual(p0.brightness, 1.0)
+        self.assertEqual(p0.contrast, 1.0)
+        self.assertEqual(p0.sharpness, 1.0)
+        self.assertFalse(p0.rendering)
+        self.assertEqual(p1.brightness, 0.5)
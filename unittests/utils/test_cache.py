@@ -0,0 +1,39 @@
+import unittest
+
+from nostaples.utils.cache import *
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = LRUCache(2)
+    
+    def tearDown(self):
+        self.cache = None
+    
+    def test_put_and_get(self):
+        self.cache.put('a', 1)
+        
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get('b'), None)
+        self.assertEqual(self.cache.get('b', 2), 2)
+        
+    def test_eviction(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.get('a')
+        self.cache.put('c', 3)
+        
+        self.assertEqual(len(self.cache), 2)
+        self.assertTrue('a' in self.cache)
+        self.assertFalse('b' in self.cache)
+        self.assertTrue('c' in self.cache)
+        
+    def test_remove_and_clear(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.remove('a')
+        
+        self.assertFalse('a' in self.cache)
+        
+        self.cache.clear()
+        
+        self.assertEqual(len(self.cache), 0)
@@ -20,4 +20,26 @@ class TestGraphics(unittest.TestCase):
         pixbuf = convert_pil_image_to_pixbuf(self.image)
         image = convert_pixbuf_to_pil_image(pixbuf)
         
-        self.assertEquals(self.image.tostring(), image.tostring())
\ No newline at end of file
+        self.assertEquals(self.image.tostring(), image.tostring())
+        
+    def test_conversion_of_grayscale(self):
+        gray_image = self.image.convert('L')
+        pixbuf = convert_pil_image_to_pixbuf(gray_image)
+        image = convert_pixbuf_to_pil_image(pixbuf)
+        
+        self.assertEquals(
+            gray_image.convert('RGB').tostring(), image.tostring())
+        
+    def test_conversion_of_region(self):
+        box = (100, 50, 300, 150)
+        pixbuf = convert_pil_image_to_pixbuf(self.image.convert('1'), box)
+        
+        self.assertEquals(pixbuf.get_width(), 200)
+        self.assertEquals(pixbuf.get_height(), 100)
+        
+    def test_scale_lineart(self):
+        image = scale_pil_image(
+            self.image.convert('1'), (100, 100), Image.ANTIALIAS)
+        
+        self.assertEquals(image.mode, 'L')
+        self.assertEquals(image.size, (100, 100))
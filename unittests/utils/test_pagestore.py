@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import Image, ImageDraw
+
+from nostaples.utils.pagestore import *
+
+class TestMappedPageStore(unittest.TestCase):
+    def setUp(self):
+        self.parent_directory = tempfile.mkdtemp()
+        self.page_store = MappedPageStore(self.parent_directory)
+    
+    def tearDown(self):
+        self.page_store.close()
+        shutil.rmtree(self.parent_directory)
+        self.page_store = None
+    
+    def _draw_image(self, mode):
+        image = Image.new(mode, (300, 700))
+        draw = ImageDraw.Draw(image)
+        
+        draw.line((0, 0) + image.size, fill=1)
+        draw.line((0, image.size[1], image.size[0], 0), fill=1)
+        del draw
+        
+        return image
+    
+    def test_store_and_load(self):
+        for mode in ['1', 'L', 'RGB']:
+            image = self._draw_image(mode)
+            key = self.page_store.store(image)
+            
+            self.assertEqual(self.page_store.get_mode(key), mode)
+            self.assertEqual(self.page_store.get_size(key), image.size)
+            
+            loaded = self.page_store.load(key)
+            
+            self.assertEqual(loaded.size, image.size)
+            self.assertEqual(loaded.tostring('raw', mode), image.tostring())
+            
+            # Only lineart needs decoding
+            if mode == 'RGB':
+                self.assertEqual(loaded.mode, 'RGBX')
+            else:
+                self.assertEqual(loaded.mode, image.mode)
+            self.assertEqual(loaded.readonly, mode != '1')
+            
+    def test_discard(self):
+        key = self.page_store.store(self._draw_image('L'))
+        self.page_store.discard(key)
+        
+        self.assertRaises(KeyError, self.page_store.load, key)
+        self.assertEqual(
+            os.listdir(self.page_store.directory), [SESSION_LOCK_FILENAME])
+        
+    def test_close(self):
+        self.page_store.store(self._draw_image('L'))
+        self.page_store.close()
+        
+        self.assertFalse(os.path.exists(self.page_store.directory))
+        
+    def test_remove_stale_sessions(self):
+        stale_directory = tempfile.mkdtemp(
+            prefix=SESSION_PREFIX, dir=self.parent_directory)
+        open(os.path.join(stale_directory, SESSION_LOCK_FILENAME), 'w').close()
+        open(os.path.join(stale_directory, '0.raw'), 'w').close()
+        
+        remove_stale_sessions(self.parent_directory)
+        
+        self.assertFalse(os.path.exists(stale_directory))
+        self.assertTrue(os.path.exists(self.page_store.directory))
+        
+class TestCompressedPageStore(unittest.TestCase):
+    def setUp(self):
+        self.page_store = CompressedPageStore(2)
+    
+    def tearDown(self):
+        self.page_store.close()
+        self.page_store = None
+    
+    def test_store_and_load(self):
+        for mode in ['1', 'L', 'RGB']:
+            image = Image.new(mode, (300, 700))
+            draw = ImageDraw.Draw(image)
+            draw.line((0, 0) + image.size, fill=1)
+            del draw
+            
+            key = self.page_store.store(image)
+            
+            self.assertEqual(self.page_store.get_mode(key), mode)
+            self.assertEqual(self.page_store.get_size(key), image.size)
+            self.assertEqual(
+                self.page_store.load(key).tostring(), image.tostring())
+            
+            self.page_store.flush()
+            self.assertEqual(self.page_store._pending, {})
+            
+            self.assertEqual(
+                self.page_store.load(key).tostring(), image.tostring())
+            
+    def test_discard(self):
+        key = self.page_store.store(Image.new('L', (300, 700)))
+        self.page_store.discard(key)
+        
+        self.assertRaises(KeyError, self.page_store.load, key)
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+import Image, ImageDraw
+from mock import patch
+from reportlab.pdfgen.canvas import Canvas as PdfCanvas
+
+from nostaples.utils.pdf import *
+
+class TestPdf(unittest.TestCase):
+    def setUp(self):
+        self.image = Image.new('1', (400, 200), 1)
+        draw = ImageDraw.Draw(self.image)
+        
+        draw.line((0, 0) + self.image.size, fill=0)
+        draw.line((0, self.image.size[1], self.image.size[0], 0), fill=0)
+        del draw
+        
+        self.pdf_path = tempfile.mktemp('.pdf')
+    
+    def tearDown(self):
+        self.image = None
+        
+        if os.path.exists(self.pdf_path):
+            os.remove(self.pdf_path)
+    
+    def test_fit_image(self):
+        self.assertEquals(fit_image(400, 200, 100, 100), (0, 25, 100, 50))
+        self.assertEquals(fit_image(200, 400, 100, 100), (25, 0, 50, 100))
+    
+    def test_draw_lineart_image(self):
+        pdf = PdfCanvas(self.pdf_path)
+        draw_lineart_image(pdf, self.image, 0, 0, 400, 200)
+        pdf.showPage()
+        pdf.save()
+        
+        data = open(self.pdf_path, 'rb').read()
+        
+        self.assertTrue('/BitsPerComponent 1' in data)
+        self.assertTrue('/DeviceGray' in data)
+    
+    def test_draw_16_bit_samples(self):
+        samples = '\xff\xff\x00\x00' * (self.image.size[0] * self.image.size[1] / 2)
+        
+        pdf = PdfCanvas(self.pdf_path)
+        draw_samples(
+            pdf, samples, self.image.size, COLOR_SPACES['L'], 16, 
+            0, 0, 200, 400, 90)
+        pdf.showPage()
+        pdf.save()
+        
+        data = open(self.pdf_path, 'rb').read()
+        
+        self.assertTrue('/BitsPerComponent 16' in data)
+        self.assertTrue(data.startswith('%PDF-1.5'))
+        
+    def test_can_embed_samples(self):
+        self.assertTrue(can_embed_samples(PdfCanvas(self.pdf_path)))
+        
+    @patch('nostaples.utils.pdf.can_embed_samples')
+    def test_draw_samples_without_embedding(self, mock_can_embed_samples):
+        mock_can_embed_samples.return_value = False
+        samples = '\xff\xff\x00\x00' * (self.image.size[0] * self.image.size[1] / 2)
+        
+        pdf = PdfCanvas(self.pdf_path)
+        draw_samples(
+            pdf, samples, self.image.size, COLOR_SPACES['L'], 16, 
+            0, 0, 200, 400, 90)
+        draw_lineart_image(pdf, self.image, 0, 0, 400, 200)
+        pdf.showPage()
+        pdf.save()
+        
+        data = open(self.pdf_path, 'rb').read()
+        
+        self.assertFalse('/BitsPerComponent 16' in data)
+        self.assertTrue('/BitsPerComponent 8' in data)
@@ -0,0 +1,42 @@
+import threading
+import unittest
+
+from nostaples.utils.workers import *
+
+class TestTransformWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.transform_pool = TransformWorkerPool(1)
+    
+    def tearDown(self):
+        self.transform_pool.stop()
+        self.transform_pool = None
+    
+    def test_priority(self):
+        started = threading.Event()
+        release = threading.Event()
+        finished = threading.Event()
+        order = []
+        ignore = lambda result: None
+        
+        def block():
+            started.set()
+            release.wait()
+            
+        # Keep the only worker busy until all the jobs are queued
+        self.transform_pool.submit('blocker', 0, ignore, block)
+        self.assertTrue(started.wait(10))
+        
+        for owner, priority in [
+            ('bulk 1', BULK_PRIORITY), ('bulk 2', BULK_PRIORITY), 
+            ('interactive 1', INTERACTIVE_PRIORITY),
+            ('interactive 2', INTERACTIVE_PRIORITY)]:
+            self.transform_pool.submit(owner, 0, ignore, order.append, owner,
+                priority=priority)
+        self.transform_pool.submit('last', 0, ignore, finished.set,
+            priority=BULK_PRIORITY)
+        
+        release.set()
+        self.assertTrue(finished.wait(10))
+        
+        self.assertEqual(order, 
+            ['interactive 1', 'interactive 2', 'bulk 1', 'bulk 2'])
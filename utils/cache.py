@@ -0,0 +1,102 @@
+#!/usr/bin/python
+
+#~ This file is part of NoStaples.
+
+#~ NoStaples is free software: you can redistribute it and/or modify
+#~ it under the terms of the GNU General Public License as published by
+#~ the Free Software Foundation, either version 3 of the License, or
+#~ (at your option) any later version.
+
+#~ NoStaples is distributed in the hope that it will be useful,
+#~ but WITHOUT ANY WARRANTY; without even the implied warranty of
+#~ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#~ GNU General Public License for more details.
+
+#~ You should have received a copy of the GNU General Public License
+#~ along with NoStaples.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module holds a simple bounded cache used to keep recently
+rendered or decoded images around without growing without limit.
+"""
+
+import threading
+
+class LRUCache(object):
+    """
+    A dictionary-like cache holding at most a fixed number of entries.
+    When full, the least recently used entry is evicted.
+    
+    Access is serialized, so a cache may be shared with worker threads.
+    """
+    def __init__(self, capacity):
+        """
+        Constructs an empty cache that will hold up to capacity entries.
+        """
+        self.capacity = capacity
+        
+        self._values = {}
+        # Keys ordered from least to most recently used
+        self._order = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._values
+    
+    # PUBLIC METHODS
+
+    def get(self, key, default=None):
+        """
+        Get the value cached for key, marking it as recently used,
+        or default if it is not cached.
+        """
+        self._lock.acquire()
+        try:
+            if key not in self._values:
+                return default
+            
+            self._order.remove(key)
+            self._order.append(key)
+            return self._values[key]
+        finally:
+            self._lock.release()
+
+    def put(self, key, value):
+        """
+        Cache a value, evicting the least recently used entries if
+        the cache is full.
+        """
+        self._lock.acquire()
+        try:
+            if key in self._values:
+                self._order.remove(key)
+            
+            self._values[key] = value
+            self._order.append(key)
+            
+            while len(self._order) > self.capacity:
+                del self._values[self._order.pop(0)]
+        finally:
+            self._lock.release()
+
+    def remove(self, key):
+        """Remove key from the cache, if present."""
+        self._lock.acquire()
+        try:
+            if key in self._values:
+                del self._values[key]
+                self._order.remove(key)
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        self._lock.acquire()
+        try:
+            self._values = {}
+            self._order = []
+        finally:
+            self._lock.release()
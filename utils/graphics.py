@@ -17,24 +17,40 @@
 
 """
 This module holds utility functions for converting between
-GTK and PIL graphics formats.
+GTK and PIL graphics formats and for transforming them.
 """
 
 import gtk
 import Image
 
-def convert_pil_image_to_pixbuf(image):
+def convert_pil_image_to_pixbuf(image, box=None):
     """
     Utility function to quickly convert a PIL Image to a GTK Pixbuf.
     Adapted from Comix by Pontus Ekberg. (http://comix.sourceforge.net/)
-    """    
-    if image.mode != 'RGB':
+    
+    Pixbufs can only hold RGB data, so other modes must be expanded.  If
+    box is given only that region of the image is converted, thereby
+    lineart and grayscale images are never expanded beyond the part
+    that is actually displayed.  RGB and RGBA data are passed through
+    without any conversion.
+    
+    @type box: tuple
+    @param box: The (left, upper, right, lower) region to convert.
+    """
+    if box is not None:
+        image = image.crop(box)
+    
+    if image.mode not in ('RGB', 'RGBA'):
         image = image.convert('RGB')
     
+    has_alpha = image.mode == 'RGBA'
+    channels = len(image.mode)
+    
     image_string = image.tostring()            
     pixbuf = gtk.gdk.pixbuf_new_from_data(
         image_string, gtk.gdk.COLORSPACE_RGB, 
-        False, 8, image.size[0], image.size[1], 3 * image.size[0])
+        has_alpha, 8, image.size[0], image.size[1], 
+        channels * image.size[0])
     
     return pixbuf
 
@@ -49,4 +65,37 @@ def convert_pixbuf_to_pil_image(pixbuf):
     image =  Image.frombuffer(
         'RGB', dimensions, pixels, 'raw', 'RGB', stride, 1)
     
-    return image
\ No newline at end of file
+    return image
+
+def scale_pil_image(image, size, resample):
+    """
+    Utility function to resize a PIL Image with the given filter while
+    keeping its mode where possible.
+    
+    PIL silently falls back to nearest neighbour filtering for lineart
+    and palette images, so a filtered resize of those is done in
+    grayscale or RGB respectively.
+    """
+    if image.size == size:
+        return image
+    
+    if resample != Image.NEAREST:
+        if image.mode == '1':
+            image = image.convert('L')
+        elif image.mode == 'P':
+            image = image.convert('RGB')
+    
+    return image.resize(size, resample)
+
+def rotate_pixbuf(pixbuf, rotation):
+    """
+    Utility function to rotate a GTK Pixbuf counter-clockwise by a
+    multiple of ninety degrees.  Rotation by zero returns the pixbuf
+    itself, not a copy.
+    """
+    rotation = rotation % 360
+    
+    if rotation == 0:
+        return pixbuf
+    
+    return pixbuf.rotate_simple(rotation)
\ No newline at end of file
@@ -0,0 +1,385 @@
+#!/usr/bin/python
+
+#~ This file is part of NoStaples.
+
+#~ NoStaples is free software: you can redistribute it and/or modify
+#~ it under the terms of the GNU General Public License as published by
+#~ the Free Software Foundation, either version 3 of the License, or
+#~ (at your option) any later version.
+
+#~ NoStaples is distributed in the hope that it will be useful,
+#~ but WITHOUT ANY WARRANTY; without even the implied warranty of
+#~ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#~ GNU General Public License for more details.
+
+#~ You should have received a copy of the GNU General Public License
+#~ along with NoStaples.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module holds the page stores, which keep the raw image data of
+scanned pages either out of the Python heap or compressed within it.
+"""
+
+import errno
+import fcntl
+import logging
+import mmap
+import os
+import Queue
+import shutil
+import tempfile
+import threading
+import zlib
+
+import Image
+
+from nostaples.utils.cache import LRUCache
+
+# Number of rows written to a spill file at a time, so that storing a
+# page never requires a second full-size copy of it in memory.
+STRIP_HEIGHT = 256
+
+# zlib level used by the compressed store, favoring speed over size.
+COMPRESSION_LEVEL = 1
+
+# Prefix of the session directories created by the mapped store.
+SESSION_PREFIX = 'session-'
+
+# File locked by a mapped store for as long as its session is open.
+SESSION_LOCK_FILENAME = 'lock'
+
+def remove_stale_sessions(parent_directory):
+    """
+    Removes session directories beneath parent_directory that were left
+    behind by sessions which ended without closing their page store,
+    such as after a crash.  Sessions that are still open in another
+    running instance hold their lock file and are left alone.
+    """
+    log = logging.getLogger('pagestore')
+    
+    if not os.path.exists(parent_directory):
+        return
+    
+    for name in os.listdir(parent_directory):
+        directory = os.path.join(parent_directory, name)
+        
+        if not name.startswith(SESSION_PREFIX) or \
+            not os.path.isdir(directory):
+            continue
+        
+        lock_path = os.path.join(directory, SESSION_LOCK_FILENAME)
+        
+        if os.path.exists(lock_path):
+            lock_file = open(lock_path, 'r')
+            try:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except IOError, e:
+                    if e.errno in (errno.EAGAIN, errno.EACCES):
+                        continue
+                    raise
+            finally:
+                lock_file.close()
+        
+        shutil.rmtree(directory, True)
+        
+        log.debug('Removed stale session %s.' % directory)
+
+class MappedPageStore(object):
+    """
+    Spills raw page images to files in a per-session directory and maps
+    them back in on demand.  Residency of page data is thereby left to the
+    operating system's page cache rather than the Python heap.
+    
+    Grayscale pages are spilled as-is and color pages padded to four bytes
+    per pixel, PIL's own layout for them, so that both are mapped without
+    being decoded.  Lineart is spilled packed, at one bit per pixel, and
+    so is decoded on each load.
+    
+    The session directory is locked while the store is open, so that
+    L{remove_stale_sessions} can tell it from those of crashed sessions.
+    
+    Each stored image is identified by an integer key returned from
+    L{store}.
+    """
+    def __init__(self, parent_directory):
+        """
+        Creates a new session directory beneath parent_directory.
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        
+        if not os.path.exists(parent_directory):
+            os.makedirs(parent_directory)
+        
+        self.directory = tempfile.mkdtemp(
+            prefix=SESSION_PREFIX, dir=parent_directory)
+        
+        self._lock_file = open(
+            os.path.join(self.directory, SESSION_LOCK_FILENAME), 'w')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        
+        # key: (path, mode, size)
+        self._pages = {}
+        self._next_key = 0
+        self._lock = threading.Lock()
+        
+        self.log.debug('Created in %s.' % self.directory)
+    
+    # PUBLIC METHODS
+
+    def store(self, image):
+        """
+        Write the data of a PIL image to a new spill file.
+        
+        @type image: a PIL image
+        @param image: The image to be stored.
+        @return: The key used to retrieve the image.
+        """
+        width, height = image.size
+        
+        self._lock.acquire()
+        try:
+            key = self._next_key
+            self._next_key += 1
+        finally:
+            self._lock.release()
+        
+        path = os.path.join(self.directory, '%i.raw' % key)
+        spill_file = open(path, 'wb')
+        try:
+            for top in xrange(0, height, STRIP_HEIGHT):
+                bottom = min(top + STRIP_HEIGHT, height)
+                strip = image.crop((0, top, width, bottom))
+                if strip.mode == 'RGB':
+                    strip = strip.convert('RGBX')
+                spill_file.write(strip.tostring())
+        finally:
+            spill_file.close()
+        
+        self._lock.acquire()
+        try:
+            self._pages[key] = (path, image.mode, image.size)
+        finally:
+            self._lock.release()
+        
+        return key
+
+    def load(self, key):
+        """
+        Map a stored image back into memory.
+        
+        The returned image is read-only.  Grayscale and color images share
+        their pixel data with the page cache, color images being returned
+        in PIL's equivalent 'RGBX' mode.  Lineart is decoded from the
+        mapping into a byte per pixel, about 8MB for a letter page at
+        300 dpi, taking a few milliseconds.
+        """
+        path, mode, size = self._pages[key]
+        
+        spill_file = open(path, 'rb')
+        try:
+            mapping = mmap.mmap(
+                spill_file.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            spill_file.close()
+        
+        if mode == 'RGB':
+            return Image.frombuffer(
+                'RGBX', size, mapping, 'raw', 'RGBX', 0, 1)
+        
+        return Image.frombuffer(mode, size, mapping, 'raw', mode, 0, 1)
+
+    def get_mode(self, key):
+        """Get the PIL mode a stored image had when it was stored."""
+        return self._pages[key][1]
+
+    def get_size(self, key):
+        """Get the (width, height) of a stored image."""
+        return self._pages[key][2]
+
+    def discard(self, key):
+        """
+        Remove a stored image.  Images already mapped from it remain
+        valid until they are garbage collected.
+        """
+        self._lock.acquire()
+        try:
+            path = self._pages.pop(key)[0]
+        finally:
+            self._lock.release()
+        
+        os.remove(path)
+
+    def close(self):
+        """Remove the session directory and everything in it."""
+        self._pages = {}
+        shutil.rmtree(self.directory, True)
+        self._lock_file.close()
+        
+        self.log.debug('Closed.')
+
+class CompressedPageStore(object):
+    """
+    Keeps raw page images in memory, losslessly compressed.  Lineart is
+    stored packed one bit per pixel, all modes are deflated at a fast
+    compression level.  Text documents typically shrink five to twenty
+    times, allowing a whole batch to stay resident without going to disk.
+    
+    Compression happens on a background thread, until it completes the
+    uncompressed image is served as-is.  A small LRU cache of decoded
+    images sits in front of the compressed data so that moving back and
+    forth between a few pages does not repeatedly decompress them.
+    """
+    def __init__(self, cache_size):
+        """
+        Starts the compression thread.
+        
+        @type cache_size: int
+        @param cache_size: The number of decoded pages to keep cached.
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        
+        # key: (mode, size, compressed data or None if still pending)
+        self._pages = {}
+        # key: image waiting to be compressed
+        self._pending = {}
+        self._decoded = LRUCache(cache_size)
+        self._next_key = 0
+        self._lock = threading.Lock()
+        
+        self._queue = Queue.Queue()
+        self._thread = threading.Thread(target=self._compress_pages)
+        self._thread.setDaemon(True)
+        self._thread.start()
+        
+        self.log.debug('Created.')
+        
+    # PUBLIC METHODS
+    
+    def store(self, image):
+        """
+        Queue a PIL image for compression.
+        
+        @type image: a PIL image
+        @param image: The image to be stored.
+        @return: The key used to retrieve the image.
+        """
+        self._lock.acquire()
+        try:
+            key = self._next_key
+            self._next_key += 1
+            self._pages[key] = (image.mode, image.size, None)
+            self._pending[key] = image
+        finally:
+            self._lock.release()
+        
+        self._queue.put(key)
+        
+        return key
+    
+    def load(self, key):
+        """
+        Get a stored image, decompressing it if it is not cached.
+        
+        The returned image may be shared with other callers, so it must
+        not be modified in place.
+        """
+        self._lock.acquire()
+        try:
+            mode, size, data = self._pages[key]
+            image = self._pending.get(key)
+        finally:
+            self._lock.release()
+            
+        if image is not None:
+            return image
+        
+        image = self._decoded.get(key)
+        
+        if image is None:
+            image = Image.fromstring(mode, size, zlib.decompress(data))
+            self._decoded.put(key, image)
+            
+        return image
+    
+    def get_mode(self, key):
+        """Get the PIL mode of a stored image."""
+        return self._pages[key][0]
+    
+    def get_size(self, key):
+        """Get the (width, height) of a stored image."""
+        return self._pages[key][1]
+    
+    def discard(self, key):
+        """Remove a stored image."""
+        self._lock.acquire()
+        try:
+            del self._pages[key]
+            self._pending.pop(key, None)
+        finally:
+            self._lock.release()
+            
+        self._decoded.remove(key)
+        
+    def flush(self):
+        """Block until all queued images have been compressed."""
+        self._queue.join()
+        
+    def close(self):
+        """Stop the compression thread and release all pages."""
+        self._queue.put(None)
+        self._thread.join()
+        
+        self._pages = {}
+        self._pending = {}
+        self._decoded.clear()
+        
+        self.log.debug('Closed.')
+        
+    # PRIVATE METHODS
+        
+    def _compress_pages(self):
+        """
+        Compress queued images until L{close} is called.
+        """
+        while True:
+            key = self._queue.get()
+            
+            if key is None:
+                self._queue.task_done()
+                return
+            
+            try:
+                self._compress_page(key)
+            finally:
+                self._queue.task_done()
+                
+    def _compress_page(self, key):
+        """
+        Compress a single queued image and release the uncompressed copy.
+        
+        Note that for mode '1' PIL's raw encoding is already packed
+        one bit per pixel.
+        """
+        self._lock.acquire()
+        try:
+            image = self._pending.get(key)
+        finally:
+            self._lock.release()
+            
+        # Discarded before it was compressed
+        if image is None:
+            return
+        
+        data = zlib.compress(image.tostring(), COMPRESSION_LEVEL)
+        
+        self._lock.acquire()
+        try:
+            if key in self._pending:
+                self._pages[key] = (image.mode, image.size, data)
+                del self._pending[key]
+        finally:
+            self._lock.release()
+            
+        self.log.debug('Compressed page %i to %i bytes.' % (key, len(data)))
+
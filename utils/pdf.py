@@ -0,0 +1,203 @@
+#!/usr/bin/python
+
+#~ This file is part of NoStaples.
+
+#~ NoStaples is free software: you can redistribute it and/or modify
+#~ it under the terms of the GNU General Public License as published by
+#~ the Free Software Foundation, either version 3 of the License, or
+#~ (at your option) any later version.
+
+#~ NoStaples is distributed in the hope that it will be useful,
+#~ but WITHOUT ANY WARRANTY; without even the implied warranty of
+#~ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#~ GNU General Public License for more details.
+
+#~ You should have received a copy of the GNU General Public License
+#~ along with NoStaples.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module holds utility functions for embedding page images in
+ReportLab PDF canvases in their native color depth.
+"""
+
+import hashlib
+import zlib
+
+import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfdoc import PDFImageXObject
+
+# PDF color spaces of the PIL modes whose samples can be embedded directly
+COLOR_SPACES = \
+{
+    '1': 'DeviceGray',
+    'L': 'DeviceGray',
+    'RGB': 'DeviceRGB'
+}
+
+# The first PDF version to allow 16 bits per sample
+PDF_16_BIT_VERSION = (1, 5)
+
+# The private parts of ReportLab's document and canvas that image
+# objects are embedded with, see can_embed_samples
+DOCUMENT_MEMBERS = ['getXObjectName', 'idToObject', 'Reference', 'addForm']
+CANVAS_MEMBERS = ['_setXObjects', 'doForm']
+
+def fit_image(image_width, image_height, width, height):
+    """
+    Utility function to fit an image within a width by height box
+    while preserving its aspect ratio, centering it along the axis
+    it does not fill.
+    
+    @return: The (x, y, width, height) of the fitted image.
+    """
+    scale = min(
+        float(width) / image_width, float(height) / image_height)
+    
+    fitted_width = image_width * scale
+    fitted_height = image_height * scale
+    
+    return ((width - fitted_width) / 2, (height - fitted_height) / 2,
+        fitted_width, fitted_height)
+
+def draw_lineart_image(pdf, image, x, y, width, height):
+    """
+    Utility function to draw a lineart (mode '1') PIL image to a
+    ReportLab canvas as a one bit per pixel DeviceGray image.
+    
+    ReportLab expands lineart to 8-bit RGB.  PIL's raw lineart data,
+    however, is already packed in the layout PDF expects, 0 being black
+    and 1 white.  For text this is a fraction of the size of the 8-bit
+    data.
+    """
+    draw_samples(
+        pdf, image.tostring(), image.size, COLOR_SPACES['1'], 1, 
+        x, y, width, height)
+
+def can_embed_samples(pdf):
+    """
+    Utility function to check that a ReportLab canvas has the private
+    methods and attributes L{draw_samples} embeds image objects with.
+    ReportLab does not promise to keep them, so if they are missing
+    images are drawn with the public drawImage instead.
+    """
+    document = getattr(pdf, '_doc', None)
+    
+    if document is None:
+        return False
+    
+    for member in DOCUMENT_MEMBERS:
+        if not hasattr(document, member):
+            return False
+    
+    for member in CANVAS_MEMBERS:
+        if not hasattr(pdf, member):
+            return False
+    
+    return True
+
+def require_pdf_version(pdf, version):
+    """
+    Utility function to raise the version a ReportLab canvas declares in
+    its PDF header to at least the given (major, minor) version.
+    
+    @return: False if this version of ReportLab does not allow its PDF
+                version to be changed.
+    """
+    document = getattr(pdf, '_doc', None)
+    
+    if not hasattr(document, '_pdfVersion'):
+        return False
+    
+    document._pdfVersion = max(tuple(document._pdfVersion), version)
+    return True
+
+def draw_samples(pdf, samples, size, color_space, bits_per_component, 
+    x, y, width, height, rotation=0):
+    """
+    Utility function to draw raw image samples to a ReportLab canvas at
+    any depth PDF supports.  Samples wider than 8 bits must be
+    big-endian.
+    
+    ReportLab only embeds 8-bit images, so the image XObject is built and
+    registered here as L{reportlab.pdfgen.canvas.Canvas.drawImage}
+    would.  The samples are deflated.  If this version of ReportLab
+    lacks the means to do that, see L{can_embed_samples}, the samples are
+    drawn with drawImage, at 8 bits per component.
+    
+    16-bit samples need PDF 1.5, so the canvas's PDF version is raised to
+    that.  If it cannot be, only the most significant byte of each sample
+    is embedded.
+    
+    @type rotation: int
+    @param rotation: Degrees counter-clockwise, a multiple of ninety, to
+                        rotate the image by.  x, y, width and height give
+                        the box of the rotated image.
+    """
+    embed_samples = can_embed_samples(pdf)
+    
+    if bits_per_component == 16 and \
+        (not embed_samples or 
+            not require_pdf_version(pdf, PDF_16_BIT_VERSION)):
+        samples = samples[::2]
+        bits_per_component = 8
+    
+    # Rotate about the center of the box
+    if rotation % 180 == 90:
+        image_width, image_height = height, width
+    else:
+        image_width, image_height = width, height
+    
+    pdf.saveState()
+    pdf.translate(x + width / 2.0, y + height / 2.0)
+    pdf.rotate(rotation % 360)
+    pdf.translate(-image_width / 2.0, -image_height / 2.0)
+    
+    if embed_samples:
+        name = _embed_samples(
+            pdf, samples, size, color_space, bits_per_component)
+        
+        pdf._currentPageHasImages = 1
+        pdf.scale(image_width, image_height)
+        pdf.doForm(name)
+    else:
+        if bits_per_component == 1:
+            mode = '1'
+        elif color_space == COLOR_SPACES['RGB']:
+            mode = 'RGB'
+        else:
+            mode = 'L'
+        
+        pdf.drawImage(
+            ImageReader(Image.fromstring(mode, size, samples)), 
+            0, 0, width=image_width, height=image_height)
+        
+    pdf.restoreState()
+
+def _embed_samples(pdf, samples, size, color_space, bits_per_component):
+    """
+    Embed raw image samples in a ReportLab canvas's document as an image
+    XObject, once however often they are drawn.  Only called if
+    L{can_embed_samples} is True.
+    
+    @return: The name of the image's form.
+    """
+    name = 'samples%s' % hashlib.md5(samples).hexdigest()
+    
+    registered_name = pdf._doc.getXObjectName(name)
+    image_object = pdf._doc.idToObject.get(registered_name, None)
+    
+    if not image_object:
+        image_object = PDFImageXObject(name)
+        image_object.width, image_object.height = size
+        image_object.bitsPerComponent = bits_per_component
+        image_object.colorSpace = color_space
+        image_object.streamContent = zlib.compress(samples)
+        image_object._filters = ('FlateDecode',)
+        image_object.mask = None
+        
+        pdf._setXObjects(image_object)
+        pdf._doc.Reference(image_object, registered_name)
+        pdf._doc.addForm(name, image_object)
+        
+    return name
@@ -0,0 +1,194 @@
+#!/usr/bin/python
+
+#~ This file is part of NoStaples.
+
+#~ NoStaples is free software: you can redistribute it and/or modify
+#~ it under the terms of the GNU General Public License as published by
+#~ the Free Software Foundation, either version 3 of the License, or
+#~ (at your option) any later version.
+
+#~ NoStaples is distributed in the hope that it will be useful,
+#~ but WITHOUT ANY WARRANTY; without even the implied warranty of
+#~ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#~ GNU General Public License for more details.
+
+#~ You should have received a copy of the GNU General Public License
+#~ along with NoStaples.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module contains those functions (in the form of Thread objects)
+that write documents to disk.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+
+import gobject
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen.canvas import Canvas as PdfCanvas
+from reportlab.lib.pagesizes import inch as points_per_inch
+
+from nostaples import constants
+from nostaples.utils.pdf import *
+from nostaples.utils.scanning import IdleObject, abort_on_exception
+
+class SavePdfThread(IdleObject, threading.Thread):
+    """
+    Responsible for writing a document to a PDF file and emitting
+    status callbacks on the main thread.
+    
+    The PDF is written to a temporary file beside the destination and
+    only moved into place once it is complete and has been verified, so
+    that a cancelled or failed save never leaves a partial file behind.
+    
+    This thread should treat its references to the PageModels as
+    read-only.  Editing the document is disabled while it runs, so
+    they will not change beneath it.
+    """
+    __gsignals__ =  {
+            'progress': (
+                gobject.SIGNAL_RUN_LAST, gobject.TYPE_NONE, (gobject.TYPE_INT, gobject.TYPE_INT)),
+            'succeeded': (
+                gobject.SIGNAL_RUN_LAST, gobject.TYPE_NONE, (gobject.TYPE_STRING,)),
+            'failed': (
+                gobject.SIGNAL_RUN_LAST, gobject.TYPE_NONE, (gobject.TYPE_STRING,)),
+            'aborted': (
+                gobject.SIGNAL_RUN_LAST, gobject.TYPE_NONE, (gobject.TYPE_PYOBJECT,)),
+            }
+
+    def __init__(self, page_models, filename, title, author, keywords):
+        """
+        Initialize the thread.
+        
+        @type page_models: list
+        @param page_models: The L{PageModel}s to save, in order.
+        """
+        IdleObject.__init__(self)
+        threading.Thread.__init__(self)
+        
+        self.log = logging.getLogger(self.__class__.__name__)
+        
+        self.page_models = page_models
+        self.filename = filename
+        self.title = title
+        self.author = author
+        self.keywords = keywords
+        
+        self.cancel_event = threading.Event()
+        
+        # Files are made readable only by their owner by mkstemp, so the
+        # default permissions are restored before the PDF is moved into place
+        self.umask = os.umask(0)
+        os.umask(self.umask)
+        
+        self.log.debug('Created.')
+
+    @abort_on_exception
+    def run(self):
+        """
+        Write each page to a temporary PDF, emitting progress as each
+        is begun, then verify it and move it into place.
+        """
+        handle, temp_file_path = tempfile.mkstemp(
+            suffix='.pdf', dir=os.path.dirname(self.filename))
+        os.close(handle)
+        
+        try:
+            pdf = PdfCanvas(temp_file_path)
+            pdf.setTitle(self.title)
+            pdf.setAuthor(self.author)
+            pdf.setKeywords(self.keywords)
+            
+            page_count = len(self.page_models)
+            
+            for page_number, page_model in enumerate(self.page_models):
+                if self.cancel_event.isSet():
+                    self.emit('failed', 'Save cancelled')
+                    return
+                
+                self.emit('progress', page_number + 1, page_count)
+                
+                size = constants.PAGESIZES_INCHES[page_model.page_size]
+                pdf_width = size[0] * points_per_inch
+                pdf_height = size[1] * points_per_inch
+                
+                # Swizzle width and height if the page has been rotated on its side
+                if abs(page_model.rotation) % 180 == 90:
+                    pdf_width, pdf_height = pdf_height, pdf_width
+                
+                pdf.setPageSize((pdf_width, pdf_height))
+                self._draw_page(pdf, page_model, pdf_width, pdf_height)
+                pdf.showPage()
+            
+            # Save complete PDF
+            pdf.save()
+            
+            if not self._verify(temp_file_path):
+                raise AssertionError(
+                    'Final PDF file was not completely written by ReportLab.')
+            
+            os.chmod(temp_file_path, 0666 & ~self.umask)
+            os.rename(temp_file_path, self.filename)
+        finally:
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
+        
+        self.emit('succeeded', self.filename)
+
+    def _verify(self, file_path):
+        """
+        Check that a PDF file begins with a PDF header and ends with an
+        end-of-file marker, as it will only if it was completely written.
+        """
+        pdf_file = open(file_path, 'rb')
+        
+        try:
+            header = pdf_file.read(5)
+            pdf_file.seek(0, os.SEEK_END)
+            pdf_file.seek(max(pdf_file.tell() - 1024, 0))
+            trailer = pdf_file.read()
+        finally:
+            pdf_file.close()
+        
+        return header == '%PDF-' and '%%EOF' in trailer
+
+    def _draw_page(self, pdf, page_model, pdf_width, pdf_height):
+        """
+        Draw a page's image to the current PDF page, fitted to the
+        given size, in the image's native depth.
+        """
+        master = page_model.get_master()
+        
+        # Unadjusted high depth scans are archived at full depth
+        if master is not None and \
+            page_model.brightness == 1.0 and \
+            page_model.contrast == 1.0 and \
+            page_model.sharpness == 1.0:
+            mode, size, samples = master
+            x, y, width, height = fit_image(
+                page_model.width, page_model.height, pdf_width, pdf_height)
+            draw_samples(
+                pdf, samples, size, COLOR_SPACES[mode], 16,
+                x, y, width, height, page_model.rotation)
+            return
+        
+        pil_image = page_model.pil_image
+        
+        # Lineart is embedded at one bit per pixel
+        if pil_image.mode == '1':
+            x, y, width, height = fit_image(
+                pil_image.size[0], pil_image.size[1],
+                pdf_width, pdf_height)
+            draw_lineart_image(pdf, pil_image, x, y, width, height)
+        # Grayscale and color are handed to ReportLab directly, which
+        # embeds grayscale as a single channel DeviceGray image
+        else:
+            if pil_image.mode not in ('L', 'RGB'):
+                pil_image = pil_image.convert('RGB')
+                
+            pdf.drawImage(
+                ImageReader(pil_image),
+                0, 0, width=pdf_width, height=pdf_height,
+                preserveAspectRatio=True)
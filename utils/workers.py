@@ -0,0 +1,197 @@
+#!/usr/bin/python
+
+#~ This file is part of NoStaples.
+
+#~ NoStaples is free software: you can redistribute it and/or modify
+#~ it under the terms of the GNU General Public License as published by
+#~ the Free Software Foundation, either version 3 of the License, or
+#~ (at your option) any later version.
+
+#~ NoStaples is distributed in the hope that it will be useful,
+#~ but WITHOUT ANY WARRANTY; without even the implied warranty of
+#~ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#~ GNU General Public License for more details.
+
+#~ You should have received a copy of the GNU General Public License
+#~ along with NoStaples.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module contains the worker threads that perform image transformations
+away from the GTK main thread.
+"""
+
+import itertools
+import logging
+import Queue
+import sys
+import threading
+
+import gobject
+
+from nostaples.utils.scanning import IdleObject
+
+# Job priorities, lowest first.  Jobs the user is waiting to see, such as
+# previews, are run ahead of renders of whole pages, so that live feedback
+# does not wait for every page of an adjustment applied to all of them.
+STOP_PRIORITY = 0
+INTERACTIVE_PRIORITY = 1
+BULK_PRIORITY = 2
+
+class TransformWorkerPool(IdleObject):
+    """
+    A pool of threads which run queued transformations and deliver their
+    results to callbacks on the main thread.
+    
+    Each job is submitted on behalf of an owner (such as a PageModel) along
+    with a generation number.  Submitting a newer generation for an owner
+    makes all of its older jobs stale: queued ones are skipped and the
+    results of those already running are dropped.
+    
+    Queued jobs are run in order of priority, then of submission.
+    """
+    __gsignals__ =  {
+            'aborted': (
+                gobject.SIGNAL_RUN_LAST, gobject.TYPE_NONE, (gobject.TYPE_PYOBJECT,)),
+            }
+
+    def __init__(self, worker_count):
+        """
+        Start worker_count worker threads.
+        """
+        IdleObject.__init__(self)
+        
+        self.log = logging.getLogger(self.__class__.__name__)
+        
+        self._queue = Queue.PriorityQueue()
+        # Orders jobs of the same priority by submission
+        self._sequence = itertools.count()
+        # owner: latest generation submitted
+        self._generations = {}
+        self._lock = threading.Lock()
+        
+        self._workers = []
+        for i in range(worker_count):
+            worker = threading.Thread(target=self._run_worker)
+            worker.setDaemon(True)
+            worker.start()
+            self._workers.append(worker)
+        
+        self.log.debug('Created with %i workers.' % worker_count)
+    
+    # PUBLIC METHODS
+
+    def submit(self, owner, generation, callback, function, *args, **kwargs):
+        """
+        Queue function(*args) to be run on a worker thread.  If the job is
+        still current when it finishes then callback(result) will be
+        called on the main thread.
+        
+        @keyword priority: INTERACTIVE_PRIORITY (the default) or
+                            BULK_PRIORITY.
+        @keyword errback: Called on the main thread with the exception
+                            info, instead of callback, if function raises
+                            while the job is still current.  The 'aborted'
+                            signal is emitted either way.
+        """
+        priority = kwargs.get('priority', INTERACTIVE_PRIORITY)
+        errback = kwargs.get('errback')
+        
+        self._lock.acquire()
+        try:
+            self._generations[owner] = generation
+            sequence = self._sequence.next()
+        finally:
+            self._lock.release()
+        
+        self._queue.put((priority, sequence, 
+            (owner, generation, callback, errback, function, args)))
+
+    def is_stale(self, owner, generation):
+        """
+        Returns True if a newer job has been submitted for owner or its
+        jobs have been cancelled.
+        """
+        self._lock.acquire()
+        try:
+            return self._generations.get(owner) != generation
+        finally:
+            self._lock.release()
+
+    def cancel(self, owner):
+        """Drop all queued and running jobs for owner."""
+        self._lock.acquire()
+        try:
+            self._generations.pop(owner, None)
+        finally:
+            self._lock.release()
+
+    def stop(self):
+        """
+        Stop all worker threads once they finish their current job.  Jobs
+        still queued are not run.
+        """
+        for worker in self._workers:
+            self._lock.acquire()
+            try:
+                sequence = self._sequence.next()
+            finally:
+                self._lock.release()
+            
+            self._queue.put((STOP_PRIORITY, sequence, None))
+        
+        for worker in self._workers:
+            worker.join()
+        
+        self._workers = []
+        
+        self.log.debug('Stopped.')
+    
+    # PRIVATE METHODS
+
+    def _run_worker(self):
+        """
+        Run queued jobs until a None job is received.
+        
+        Exceptions are caught per job so that one failed transformation
+        does not take down the worker.  They are passed to the main
+        thread via the 'aborted' signal, as in L{abort_on_exception}.
+        """
+        while True:
+            priority, sequence, job = self._queue.get()
+            
+            if job is None:
+                return
+            
+            owner, generation, callback, errback, function, args = job
+            
+            if self.is_stale(owner, generation):
+                continue
+            
+            try:
+                result = function(*args)
+            except Exception, e:
+                self.log.error('Exception type %s: %s' % (e.__class__.__name__, e.message))
+                exc_info = sys.exc_info()
+                self.emit('aborted', exc_info)
+                
+                if errback is not None:
+                    gobject.idle_add(
+                        self._deliver, owner, generation, errback, exc_info)
+                continue
+            
+            if self.is_stale(owner, generation):
+                continue
+            
+            gobject.idle_add(
+                self._deliver, owner, generation, callback, result)
+
+    def _deliver(self, owner, generation, callback, result):
+        """
+        Pass a result to its callback on the main thread, checking once
+        more that it has not been superseded while waiting to be
+        delivered.
+        """
+        if not self.is_stale(owner, generation):
+            callback(result)
+        
+        return False
@@ -0,0 +1,62 @@
+#!/usr/bin/python
+
+#~ This file is part of NoStaples.
+
+#~ NoStaples is free software: you can redistribute it and/or modify
+#~ it under the terms of the GNU General Public License as published by
+#~ the Free Software Foundation, either version 3 of the License, or
+#~ (at your option) any later version.
+
+#~ NoStaples is distributed in the hope that it will be useful,
+#~ but WITHOUT ANY WARRANTY; without even the implied warranty of
+#~ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#~ GNU General Public License for more details.
+
+#~ You should have received a copy of the GNU General Public License
+#~ along with NoStaples.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+This module holds the ContinuousView which exposes all the scanned pages
+of the document in a single scrolling column.
+"""
+
+import logging
+import os
+
+import gtk
+from gtkmvc.view import View
+
+from nostaples import constants
+
+class ContinuousView(View):
+    """
+    Exposes all the scanned pages of the document in a single scrolling
+    column, as an alternative to the L{PageView}.
+    """
+    def __init__(self, application):
+        """
+        Constructs the ContinuousView, including setting up controls that
+        could not be configured in Glade.
+        """
+        self.application = application
+        continuous_view_glade = os.path.join(
+            constants.GUI_DIRECTORY, 'continuous_view.glade')
+        View.__init__(
+            self, application.get_continuous_controller(), 
+            continuous_view_glade, 'dummy_continuous_view_window', 
+            None, False)
+            
+        self.log = logging.getLogger(self.__class__.__name__)
+        
+        self['continuous_view_vertical_scrollbar'].set_adjustment(
+            self['continuous_view_layout'].get_vadjustment())
+        
+        self['continuous_view_layout'].modify_bg(
+            gtk.STATE_NORMAL, 
+            gtk.gdk.colormap_get_system().alloc_color(
+                gtk.gdk.Color(0, 0, 0), False, True))
+        
+        application.get_continuous_controller().register_view(self)
+        
+        self.log.debug('Created.')
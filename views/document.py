@@ -55,8 +55,6 @@ class DocumentView(View):
         self['thumbnails_column'] = gtk.TreeViewColumn(None)
         self['thumbnails_cell'] = gtk.CellRendererPixbuf()
         self['thumbnails_column'].set_sizing(gtk.TREE_VIEW_COLUMN_FIXED)
-        self['thumbnails_column'].set_fixed_width(
-            constants.DEFAULT_THUMBNAIL_SIZE)
         self['thumbnails_tree_view'].append_column(self['thumbnails_column'])
         self['thumbnails_column'].pack_start(self['thumbnails_cell'], True)
         self['thumbnails_column'].set_cell_data_func(
@@ -66,6 +64,12 @@ class DocumentView(View):
         self['thumbnails_tree_view'].set_headers_visible(False)
         self['thumbnails_tree_view'].set_property('can-focus', False)
         self['thumbnails_tree_view'].set_reorderable(True)
+        
+        # Every row is the same height, so that only the visible rows'
+        # thumbnails need be asked for, see 
+        # L{thumbnails_column_cell_data_func}
+        self.set_thumbnail_size(constants.DEFAULT_THUMBNAIL_SIZE)
+        self['thumbnails_tree_view'].set_fixed_height_mode(True)
 
         self['thumbnails_scrolled_window'].add(self['thumbnails_tree_view'])
         
@@ -74,10 +78,18 @@ class DocumentView(View):
         self['thumbnails_context_menu'].append(self['delete_menu_item'])
         self['thumbnails_context_menu'].show_all()
 
-        # Dock sub-views
+        # Dock sub-views, only one of which is shown at a time
+        self['page_view_docking_box'] = gtk.HBox()
+        self['page_view_docking_viewport'].add(self['page_view_docking_box'])
+        self['page_view_docking_box'].show()
+        
         page_view = self.application.get_page_view()
         page_view['page_view_table'].reparent(
-            self['page_view_docking_viewport'])
+            self['page_view_docking_box'])
+        
+        continuous_view = self.application.get_continuous_view()
+        continuous_view['continuous_view_table'].reparent(
+            self['page_view_docking_box'])
         
         application.get_document_controller().register_view(self)
         
@@ -89,12 +101,24 @@ class DocumentView(View):
         Extract the thumbnail pixbuf from the PageModel stored in the
         DocumentModel ListStore, composite a page number into that image,
         and set the resulting pixbuf to the cell renderer.
+        
+        This is only called for rows as they are shown, so a placeholder
+        is shown for pages whose thumbnail has not been rendered yet.  The
+        row is redrawn when it has been.
         """
         page_model = document_model.get_value(iter, 0)
         page_number = document_model.get_path(iter)[0] + 1
+        thumbnail_size = \
+            self.application.get_preferences_model().thumbnail_size
+        
+        pixbuf = page_model.get_thumbnail_pixbuf(thumbnail_size)
+        
+        if pixbuf is None:
+            pixbuf = self._get_placeholder_pixbuf(
+                page_model.width, page_model.height, thumbnail_size)
 
         # Copy thumbnail pixbuf, get pixmap of image, and create cairo context
-        pixbuf = page_model.thumbnail_pixbuf.copy()
+        pixbuf = pixbuf.copy()
         pixmap, mask = pixbuf.render_pixmap_and_mask()
         context = pangocairo.CairoContext(pixmap.cairo_create())
         context.set_antialias(cairo.ANTIALIAS_NONE)
@@ -131,6 +155,31 @@ class DocumentView(View):
             pixmap, pixmap.get_colormap(), 0, 0, 0, 0, -1, -1)
         cell_renderer.set_property('pixbuf', pixbuf)
         
+    def set_thumbnail_size(self, thumbnail_size):
+        """
+        Size the thumbnails column and its rows to fit thumbnails of
+        either orientation.
+        """
+        self['thumbnails_column'].set_fixed_width(thumbnail_size)
+        self['thumbnails_cell'].set_fixed_size(thumbnail_size, thumbnail_size)
+        self._placeholder_pixbufs = {}
+        
+    def _get_placeholder_pixbuf(self, width, height, thumbnail_size):
+        """
+        Get a blank pixbuf the size of the thumbnail of a width by height
+        page.  They are shared by all pages of the same size.
+        """
+        scale = float(thumbnail_size) / max(width, height, 1)
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        
+        if size not in self._placeholder_pixbufs:
+            pixbuf = gtk.gdk.Pixbuf(
+                gtk.gdk.COLORSPACE_RGB, False, 8, size[0], size[1])
+            pixbuf.fill(constants.THUMBNAIL_PLACEHOLDER_COLOR)
+            self._placeholder_pixbufs[size] = pixbuf
+            
+        return self._placeholder_pixbufs[size]
+        
     def set_adjustments_sensitive(self, sensitive):
         """
         Set all adjustment controls sensitive or insensitive
@@ -86,6 +86,15 @@ class PreferencesView(View):
             'changed', 
             preferences_controller.on_toolbar_style_combobox_changed)
         
+        setup_combobox(
+            self['page_storage_combobox'],
+            constants.PAGE_STORAGE_LIST, 
+            application.get_preferences_model().page_storage)
+        
+        self['page_storage_combobox'].connect(
+            'changed', 
+            preferences_controller.on_page_storage_combobox_changed)
+        
         # Setup the unavailable scanners tree view
         unavailable_liststore = gtk.ListStore(str, str)
         self['unavailable_tree_view'] = gtk.TreeView()
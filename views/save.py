@@ -44,7 +44,7 @@ class SaveView(View):
             constants.GUI_DIRECTORY, 'save_dialog.glade')
         View.__init__(
             self, self.application.get_save_controller(), 
-            save_dialog_glade, 'save_dialog', 
+            save_dialog_glade, ['save_dialog', 'save_progress_window'], 
             None, False)
             
         self.log = logging.getLogger(self.__class__.__name__)
@@ -53,6 +53,8 @@ class SaveView(View):
         # top-level widgets
         self['save_dialog'].set_transient_for(
             self.application.get_main_view()['scan_window'])
+        self['save_progress_window'].set_transient_for(
+            self.application.get_main_view()['scan_window'])
         
         # Setup filename filter
         filename_filter = gtk.FileFilter()